@@ -3,8 +3,41 @@ from .instruction import (
     __EXERCISE_DESIGNER_INSTRUCTIONS__,
 )
 
+from .run_state import (
+    RunStateRegistry,
+    run_state_registry,
+    is_terminal_run_state,
+    TERMINAL_RUN_STATES,
+)
+
 from .event_handler import (
     AssistantHandler,
     ExerciseDesignerHandler,
-    client,
-)
\ No newline at end of file
+    get_client,
+    write_behind_stats,
+)
+
+from .async_event_handler import (
+    AsyncAssistantHandler,
+    AsyncExerciseDesignerHandler,
+    get_async_client,
+    ASSISTANT_USE_ASYNC,
+)
+
+from .runner import (
+    create_thread,
+    delete_thread,
+    create_message,
+    run_assistant,
+)
+
+from .thread_pool import (
+    AssistantThreadPool,
+    thread_pool,
+)
+
+from .streaming import (
+    stream_assistant_run,
+    format_sse,
+    SSE_HEADERS,
+)
@@ -0,0 +1,155 @@
+import asyncio, os
+
+from functools import partial
+from typing import Any, Callable, List, Optional
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from openai import AsyncAssistantEventHandler, AsyncOpenAI
+from openai.types.beta.threads import Message
+
+from .event_handler import (
+    AssistantMessageWriter,
+    run_tool_call,
+    run_tool_call_isolated,
+    tool_error_output,
+    tool_executor,
+    override,
+    ASSISTANT_TOOL_TIMEOUT,
+)
+from .run_state import is_terminal_run_state
+from utils import db_pool
+
+## 비동기 OpenAI 클라이언트 (처음 사용할 때 생성) ##
+_async_client: Optional[AsyncOpenAI] = None
+
+def get_async_client() -> AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _async_client
+
+# 비동기 파이프라인 사용 여부 (0이면 기존 동기 클라이언트로 동작)
+ASSISTANT_USE_ASYNC = os.getenv("ASSISTANT_USE_ASYNC", "1") == "1"
+
+## 여러 도구 호출을 동시에 실행 (비동기) ##
+async def arun_tool_calls(thread_id: str, tool_calls: List[Any]) -> List[dict]:
+    loop = asyncio.get_running_loop()
+
+    async def run_one(tool) -> dict:
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(tool_executor, partial(run_tool_call_isolated, thread_id, tool.function.name, tool.function.arguments)),
+                timeout=ASSISTANT_TOOL_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            print(f"[tool] {tool.function.name} timed out after {ASSISTANT_TOOL_TIMEOUT}s")
+            result = tool_error_output("도구 실행 시간이 초과되었습니다.")
+        except Exception as e:
+            result = tool_error_output(f"예상치 못한 오류가 발생했습니다: {str(e)}")
+        return {"tool_call_id" : tool.id, "output": result}
+
+    return list(await asyncio.gather(*(run_one(tool) for tool in tool_calls)))
+
+
+# 이벤트 루프를 막지 않도록 OpenAI 호출은 AsyncOpenAI로, DB 작업은 스레드풀에서 실행한다.
+
+class AsyncAssistantHandler(AssistantMessageWriter, AsyncAssistantEventHandler):
+    def __init__(self, db: Session, thread_id: str, event_sink: Optional[Callable[[str, dict], None]] = None):
+        super().__init__()
+        self.init_writer(db, thread_id, event_sink)
+
+    async def on_event(self, event: Any) -> None:
+        if is_terminal_run_state(event.event):
+            await db_pool.run(self.update_message_status, event.event)
+        else:
+            self.update_message_status(event.event)
+        if event.event.startswith('thread.run.'):
+            self.emit("run_state", {"state": event.event})
+        if event.event == 'thread.run.requires_action':
+            run_id = event.data.id
+            await self.handle_requires_action(event.data, run_id)
+        elif event.event == 'thread.run.cancelled':
+            raise HTTPException(status_code=400, detail="쓰레드가 취소되었습니다.")
+        elif event.event == 'thread.run.created':
+            await db_pool.run(self.create_run_message)
+        else:
+            pass
+
+    @override
+    async def on_tool_call_created(self, tool_call):
+        self.function_name = tool_call.function.name
+        self.tool_id = tool_call.id
+        self.emit("tool_call", {"id": tool_call.id, "name": tool_call.function.name})
+
+    @override
+    async def handle_requires_action(self, data, run_id):
+        tool_outputs = await arun_tool_calls(self.current_run.thread_id, data.required_action.submit_tool_outputs.tool_calls)
+        await self.submit_tool_outputs(tool_outputs, run_id)
+
+    @override
+    async def submit_tool_outputs(self, tool_outputs, run_id):
+        async with get_async_client().beta.threads.runs.submit_tool_outputs_stream(
+            thread_id=self.current_run.thread_id,
+            run_id=self.current_run.id,
+            tool_outputs=tool_outputs,
+            event_handler=AsyncAssistantHandler(self.db, self.thread_id, self.event_sink),
+        ) as stream:
+            await stream.until_done()
+
+    @override
+    async def on_text_delta(self, delta, snapshot):
+        if self.buffer_delta(delta.value):
+            await db_pool.run(self.flush_text)
+
+    @override
+    async def on_message_done(self, content: Message) -> None:
+        await db_pool.run(self.finish_message, content.content[0].text.value)
+
+
+class AsyncExerciseDesignerHandler(AsyncAssistantEventHandler):
+    def __init__(self, db: Session, thread_id: str):
+        super().__init__()
+        self.db = db
+        self.thread_id = thread_id
+
+    async def on_event(self, event: Any) -> None:
+        if event.event == 'thread.run.requires_action':
+            run_id = event.data.id
+            await self.handle_requires_action(event.data, run_id)
+        elif event.event == 'thread.run.cancelled':
+            raise HTTPException(status_code=400, detail="쓰레드가 취소되었습니다.")
+        else:
+            pass
+
+    @override
+    async def on_tool_call_created(self, tool_call):
+        self.function_name = tool_call.function.name
+        self.tool_id = tool_call.id
+
+    @override
+    async def on_text_delta(self, delta, snapshot):
+        print(f"{delta.value}")
+
+    @override
+    async def handle_requires_action(self, data, run_id):
+        tool_outputs = []
+
+        for tool in data.required_action.submit_tool_outputs.tool_calls:
+            # 설계 어시스턴트는 현재 도구를 사용하지 않는다.
+            result = await db_pool.run(run_tool_call, self.db, self.current_run.thread_id, tool.function.name, tool.function.arguments)
+            tool_outputs.append({"tool_call_id" : tool.id, "output": result})
+        await self.submit_tool_outputs(tool_outputs, run_id)
+
+    @override
+    async def submit_tool_outputs(self, tool_outputs, run_id):
+        async with get_async_client().beta.threads.runs.submit_tool_outputs_stream(
+            thread_id=self.current_run.thread_id,
+            run_id=self.current_run.id,
+            tool_outputs=tool_outputs,
+            event_handler=AsyncExerciseDesignerHandler(self.db, self.current_run.thread_id),
+        ) as stream:
+            await stream.until_done()
+
+    @override
+    async def on_message_done(self, content: Message) -> None:
+        print(f"on_message_done: {content.content[0].text.value}")
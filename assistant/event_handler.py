@@ -1,6 +1,7 @@
-import json, os
+import json, os, threading, time
 
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy import desc
@@ -11,11 +12,28 @@ from openai.types.beta.threads import Message
 
 from functions import get_user_train_program, get_body_measurement_records, generate_user_train_program
 from models import AssistantThread, AssistantMessage
+from database import ReadSessionLocal
 from assistant import __INSTRUCTIONS__, __EXERCISE_DESIGNER_INSTRUCTIONS__
+from .run_state import run_state_registry, is_terminal_run_state
 
-openai_api_key = os.getenv("OPENAI_API_KEY")
+## OpenAI 클라이언트 (처음 사용할 때 생성) ##
+_client: Optional[OpenAI] = None
 
-client = OpenAI(api_key=openai_api_key)
+def get_client() -> OpenAI:
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+# 응답 델타를 메모리에 모았다가 DB에 반영하는 주기(초)와 크기(byte)
+ASSISTANT_FLUSH_INTERVAL = float(os.getenv("ASSISTANT_FLUSH_INTERVAL", "1.0"))
+ASSISTANT_FLUSH_BYTES = int(os.getenv("ASSISTANT_FLUSH_BYTES", "512"))
+
+# 도구 호출 병렬 실행 설정 (호출별 제한 시간(초), 워커 수)
+ASSISTANT_TOOL_TIMEOUT = float(os.getenv("ASSISTANT_TOOL_TIMEOUT", "120"))
+ASSISTANT_TOOL_WORKERS = int(os.getenv("ASSISTANT_TOOL_WORKERS", "4"))
+
+tool_executor = ThreadPoolExecutor(max_workers=ASSISTANT_TOOL_WORKERS, thread_name_prefix="assistant-tool")
 
 def override(method: Any) -> Any:
     return method
@@ -31,40 +49,211 @@ def override(method: Any) -> Any:
 #                  o888o                                               
 
 
-class AssistantHandler(AssistantEventHandler):
-    def __init__(self, db: Session, thread_id: str):
-        super().__init__()
+## 도구 호출 실행 ##
+# 동기/비동기 핸들러가 함께 사용하며, 결과는 submit_tool_outputs에 넘길 문자열로 반환한다.
+def run_tool_call(db: Session, thread_id: str, function_name: str, arguments: Optional[str]) -> str:
+    print(f"tool.function.name: {function_name}")
+    print(f"tool.function.arguments: {arguments}")
+    tool_arguments = json.loads(arguments) if arguments else {}
+
+    result = None
+    if function_name == "get_user_train_program":
+        result = get_user_train_program(db=db, thread_id=thread_id, **tool_arguments)
+    elif function_name == "generate_user_train_program":
+        result = generate_user_train_program(db=db, thread_id=thread_id, **tool_arguments)
+
+    if isinstance(result, dict):
+        result = json.dumps(result, ensure_ascii=False)
+    elif not isinstance(result, str):
+        result = str(result)
+    return result
+
+## 도구 실패 결과 ##
+def tool_error_output(message: str) -> str:
+    return json.dumps({"status": "failed", "message": message}, ensure_ascii=False)
+
+## 독립 세션으로 도구 호출 실행 ##
+# 병렬로 실행되는 도구끼리 세션을 공유하지 않도록 호출마다 새 세션을 연다.
+# 도구는 대부분 조회이므로 읽기 세션을 사용한다. (쓰기는 자동으로 주 DB로 간다)
+def run_tool_call_isolated(thread_id: str, function_name: str, arguments: Optional[str]) -> str:
+    db = ReadSessionLocal(info={"thread_id": thread_id})
+    started = time.perf_counter()
+    try:
+        return run_tool_call(db, thread_id, function_name, arguments)
+    finally:
+        db.close()
+        print(f"[tool] {function_name} wall_time={time.perf_counter() - started:.3f}s")
+
+## 여러 도구 호출을 동시에 실행 ##
+# 모든 결과를 모아 submit_tool_outputs에 한 번에 넘길 수 있는 형태로 반환한다.
+def run_tool_calls(thread_id: str, tool_calls: List[Any]) -> List[dict]:
+    futures = [
+        (tool, tool_executor.submit(run_tool_call_isolated, thread_id, tool.function.name, tool.function.arguments))
+        for tool in tool_calls
+    ]
+    # 모든 호출이 동시에 시작되므로 같은 마감 시각을 기준으로 기다린다.
+    deadline = time.monotonic() + ASSISTANT_TOOL_TIMEOUT
+    tool_outputs = []
+    for tool, future in futures:
+        try:
+            result = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            print(f"[tool] {tool.function.name} timed out after {ASSISTANT_TOOL_TIMEOUT}s")
+            result = tool_error_output("도구 실행 시간이 초과되었습니다.")
+        except Exception as e:
+            result = tool_error_output(f"예상치 못한 오류가 발생했습니다: {str(e)}")
+        tool_outputs.append({"tool_call_id" : tool.id, "output": result})
+    return tool_outputs
+
+
+## write-behind 통계 ##
+class WriteBehindStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.deltas = 0
+        self.db_writes = 0
+        self.saved_writes = 0
+
+    def record(self, deltas: int, db_writes: int) -> int:
+        saved_writes = max(deltas - db_writes, 0)
+        with self._lock:
+            self.messages += 1
+            self.deltas += deltas
+            self.db_writes += db_writes
+            self.saved_writes += saved_writes
+        return saved_writes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "messages": self.messages,
+                "deltas": self.deltas,
+                "db_writes": self.db_writes,
+                "saved_writes": self.saved_writes,
+            }
+
+write_behind_stats = WriteBehindStats()
+
+
+## 어시스턴트 응답 기록 ##
+# 실행 상태 갱신, 응답 메세지 생성, 델타 write-behind 버퍼를 담당한다.
+# DB 작업은 모두 동기 함수이며, 비동기 핸들러는 스레드풀에서 호출한다.
+class AssistantMessageWriter:
+    def init_writer(self, db: Session, thread_id: str, event_sink: Optional[Callable[[str, dict], None]] = None):
         self.db = db
         self.thread_id = thread_id
+        # SSE 스트리밍 모드일 때 이벤트를 클라이언트로 전달하는 콜백
+        self.event_sink = event_sink
+
+        # write-behind 버퍼
+        self.flush_interval = ASSISTANT_FLUSH_INTERVAL
+        self.flush_bytes = ASSISTANT_FLUSH_BYTES
+        self.message_id = None
+        self.base_content = ""
+        self.text_buffer = []
+        self.pending_bytes = 0
+        self.last_flush = time.monotonic()
+        self.delta_count = 0
+        self.db_writes = 0
+
+    def emit(self, event: str, data: dict):
+        if self.event_sink is not None:
+            self.event_sink(event, data)
 
+    ## 실행 상태 갱신 ##
+    # 진행 중 상태는 메모리 저장소에만 두고, 종료 상태만 assistant_threads에 기록한다.
     def update_message_status(self, status: str):
+        run_state_registry.set(self.thread_id, status)
+        if not is_terminal_run_state(status):
+            return
+        try:
+            self.db.query(AssistantThread).filter(AssistantThread.thread_id == self.thread_id).update({"run_state": status})
+            self.db.commit()
+        except SQLAlchemyError:
+            self.db.rollback()
+
+    ## 응답이 기록될 빈 메세지 생성 ##
+    def create_run_message(self):
+        new_message = AssistantMessage(
+            thread_id=self.thread_id,
+            sender_type="assistant",
+            content="",
+            created_at=datetime.utcnow()
+        )
+        self.db.add(new_message)
+        self.db.commit()
+        self.db.refresh(new_message)
+        self.message_id = new_message.message_id
+
+    ## 현재 응답이 기록될 메세지 조회 ##
+    # run.created에서 만든 메세지를 기본으로 하고, 도구 호출 후 이어지는 핸들러는 최신 메세지를 한 번만 조회한다.
+    def get_current_message(self) -> Optional[AssistantMessage]:
+        if self.message_id is not None:
+            return self.db.get(AssistantMessage, self.message_id)
+        message = self.db.query(AssistantMessage).filter(AssistantMessage.thread_id == self.thread_id).order_by(desc(AssistantMessage.created_at)).first()
+        if message:
+            self.message_id = message.message_id
+            self.base_content = message.content
+        return message
+
+    ## 버퍼에 모인 텍스트를 DB에 반영 ##
+    def flush_text(self, final_text: Optional[str] = None):
         try:
-            message = self.db.query(AssistantMessage).filter(AssistantMessage.thread_id == self.thread_id).order_by(desc(AssistantMessage.created_at)).first()
+            # 도구 호출 후 핸들러는 여기서 기존 내용(base_content)을 처음 불러오므로 텍스트보다 먼저 조회
+            message = self.get_current_message()
+            text = final_text if final_text is not None else self.base_content + "".join(self.text_buffer)
             if message:
-                self.db.query(AssistantThread).filter(AssistantThread.thread_id == self.thread_id).update({"run_state": status})
+                message.content = text
                 self.db.commit()
-            else:
-                raise HTTPException(status_code=404, detail="메세지가 존재하지 않습니다.")
-        except SQLAlchemyError:
+                self.db_writes += 1
+        except SQLAlchemyError as e:
             self.db.rollback()
+            # raise HTTPException(status_code=500, detail=f"메세지 델타 처리 실패: {str(e)}")
+        self.pending_bytes = 0
+        self.last_flush = time.monotonic()
+
+    ## 델타를 버퍼에 추가하고, DB 반영이 필요한지 반환 ##
+    def buffer_delta(self, value: str) -> bool:
+        self.delta_count += 1
+        self.text_buffer.append(value)
+        self.pending_bytes += len(value.encode("utf-8"))
+
+        if self.event_sink is not None:
+            # 스트리밍 모드에서는 델타를 바로 전달하고, DB에는 on_message_done에서 한 번만 기록
+            self.emit("delta", {"value": value})
+            return False
+
+        return self.pending_bytes >= self.flush_bytes or time.monotonic() - self.last_flush >= self.flush_interval
+
+    ## 메세지 완료 처리 ##
+    def finish_message(self, text: str):
+        self.flush_text(final_text=text)
+        self.text_buffer = []
+        self.base_content = text
+
+        # 델타마다 커밋했을 때와 비교해 절약한 DB 쓰기 횟수
+        saved_writes = write_behind_stats.record(self.delta_count, self.db_writes)
+        print(f"[{type(self).__name__}] thread={self.thread_id} deltas={self.delta_count} db_writes={self.db_writes} saved_writes={saved_writes}")
+        self.emit("message_done", {"content": text})
+
+
+class AssistantHandler(AssistantMessageWriter, AssistantEventHandler):
+    def __init__(self, db: Session, thread_id: str, event_sink: Optional[Callable[[str, dict], None]] = None):
+        super().__init__()
+        self.init_writer(db, thread_id, event_sink)
 
     def on_event(self, event: Any) -> None:
         self.update_message_status(event.event)
+        if event.event.startswith('thread.run.'):
+            self.emit("run_state", {"state": event.event})
         if event.event == 'thread.run.requires_action':
             run_id = event.data.id
             self.handle_requires_action(event.data, run_id)
         elif event.event == 'thread.run.cancelled':
             raise HTTPException(status_code=400, detail="쓰레드가 취소되었습니다.")
         elif event.event == 'thread.run.created':
-            new_message = AssistantMessage(
-                thread_id=self.thread_id,
-                sender_type="assistant",
-                content="",
-                created_at=datetime.utcnow()
-            )
-            self.db.add(new_message)
-            self.db.commit()
-            self.db.refresh(new_message)
+            self.create_run_message()
         else:
             pass
         
@@ -72,66 +261,32 @@ class AssistantHandler(AssistantEventHandler):
     def on_tool_call_created(self, tool_call):
         self.function_name = tool_call.function.name
         self.tool_id = tool_call.id
+        self.emit("tool_call", {"id": tool_call.id, "name": tool_call.function.name})
 
     @override
     def handle_requires_action(self, data, run_id):
-        tool_outputs = []
-
-        for tool in data.required_action.submit_tool_outputs.tool_calls:
-            print(f"tool.function.name: {tool.function.name}")
-            print(f"tool.function.arguments: {tool.function.arguments}")
-            tool_arguments = json.loads(tool.function.arguments) if tool.function.arguments else {}
-
-            if tool.function.name == "get_user_train_program":
-                result = get_user_train_program(db=self.db, thread_id=self.current_run.thread_id, **tool_arguments)
-            elif tool.function.name == "generate_user_train_program":
-                result = generate_user_train_program(db=self.db, thread_id=self.current_run.thread_id, **tool_arguments)
-
-
-            if isinstance(result, dict):
-                result = json.dumps(result, ensure_ascii=False)
-            elif not isinstance(result, str):
-                result = str(result)
-            tool_outputs.append({"tool_call_id" : tool.id, "output": result})
+        tool_outputs = run_tool_calls(self.current_run.thread_id, data.required_action.submit_tool_outputs.tool_calls)
         self.submit_tool_outputs(tool_outputs, run_id)
 
     @override
     def submit_tool_outputs(self, tool_outputs, run_id):
-        with client.beta.threads.runs.submit_tool_outputs_stream(
+        with get_client().beta.threads.runs.submit_tool_outputs_stream(
             thread_id=self.current_run.thread_id,
             run_id=self.current_run.id,
             tool_outputs=tool_outputs,
-            event_handler=AssistantHandler(self.db, self.thread_id),
+            event_handler=AssistantHandler(self.db, self.thread_id, self.event_sink),
         ) as stream:
-            try:
-                for text in stream.text_deltas:
-                    self.db.commit()
-            except Exception as e:
-                self.db.rollback()
+            # 응답 기록은 새 핸들러의 writer가 버퍼 단위로 커밋한다. (델타마다 커밋하지 않음)
+            stream.until_done()
+
     @override
     def on_text_delta(self, delta, snapshot):
-        try:
-            message = self.db.query(AssistantMessage).filter(AssistantMessage.thread_id == self.thread_id).order_by(desc(AssistantMessage.created_at)).first()
-            if message:
-                new_content = message.content + delta.value
-                message.content = new_content
-                self.db.commit()
-            # else:
-                # raise HTTPException(status_code=404, detail="메세지가 존재하지 않습니다.")
-        except SQLAlchemyError as e:
-            self.db.rollback()
-            # raise HTTPException(status_code=500, detail=f"메세지 델타 처리 실패: {str(e)}")
+        if self.buffer_delta(delta.value):
+            self.flush_text()
 
     @override
     def on_message_done(self, content: Message) -> None:
-        try:
-            message = self.db.query(AssistantMessage).filter(AssistantMessage.thread_id == self.thread_id).order_by(desc(AssistantMessage.created_at)).first()
-            if message:
-                message.content = content.content[0].text.value
-                self.db.commit()
-        except SQLAlchemyError as e:
-            self.db.rollback()
-            # raise HTTPException(status_code=500, detail=f"메세지 종료 처리 실패: {str(e)}")
+        self.finish_message(content.content[0].text.value)
 
 
 class ExerciseDesignerHandler(AssistantEventHandler):
@@ -179,7 +334,7 @@ class ExerciseDesignerHandler(AssistantEventHandler):
 
     @override
     def submit_tool_outputs(self, tool_outputs, run_id):
-        with client.beta.threads.runs.submit_tool_outputs_stream(
+        with get_client().beta.threads.runs.submit_tool_outputs_stream(
             thread_id=self.current_run.thread_id,
             run_id=self.current_run.id,
             tool_outputs=tool_outputs,
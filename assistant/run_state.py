@@ -0,0 +1,58 @@
+import os, threading, time
+
+from typing import Dict, Optional, Tuple
+
+# DB(assistant_threads.run_state)에 기록하는 종료 상태
+TERMINAL_RUN_STATES = ("thread.run.completed", "thread.run.failed", "thread.run.cancelled")
+
+# 메모리에 보관하는 실행 상태의 유효 시간(초)
+RUN_STATE_TTL = float(os.getenv("ASSISTANT_RUN_STATE_TTL", "600"))
+
+## 쓰레드별 실행 상태 저장소 ##
+# 스트림 이벤트마다 DB를 갱신하지 않고 프로세스 메모리에 최신 상태만 보관한다.
+# TTL이 지난 상태는 조회 시 제거되며, 이 경우 호출부는 DB 값을 사용한다.
+# 다시 조회되지 않는 쓰레드의 상태는 set() 때 주기적으로(최대 TTL마다 한 번) 정리한다.
+class RunStateRegistry:
+    def __init__(self, ttl: float = RUN_STATE_TTL):
+        self.ttl = ttl
+        self._states: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._next_purge = time.monotonic() + ttl
+        self.purged = 0
+
+    def set(self, thread_id: str, state: str):
+        now = time.monotonic()
+        with self._lock:
+            self._states[thread_id] = (state, now + self.ttl)
+            if now >= self._next_purge:
+                self._purge_expired(now)
+
+    def get(self, thread_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._states.get(thread_id)
+            if entry is None:
+                return None
+            state, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._states[thread_id]
+                return None
+            return state
+
+    def discard(self, thread_id: str):
+        with self._lock:
+            self._states.pop(thread_id, None)
+
+    def purge_expired(self):
+        with self._lock:
+            self._purge_expired(time.monotonic())
+
+    def _purge_expired(self, now: float):
+        for thread_id in [k for k, (_, expires_at) in self._states.items() if expires_at < now]:
+            del self._states[thread_id]
+            self.purged += 1
+        self._next_purge = now + self.ttl
+
+run_state_registry = RunStateRegistry()
+
+def is_terminal_run_state(state: Optional[str]) -> bool:
+    return state in TERMINAL_RUN_STATES
@@ -0,0 +1,57 @@
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from .event_handler import AssistantHandler, get_client
+from .async_event_handler import AsyncAssistantHandler, get_async_client, ASSISTANT_USE_ASYNC
+from .instruction import __INSTRUCTIONS__
+from utils import io_pool
+
+## OpenAI 호출 진입점 ##
+# ASSISTANT_USE_ASYNC=1(기본)이면 AsyncOpenAI를 사용해 이벤트 루프를 막지 않고,
+# 0이면 기존 동기 클라이언트를 외부 I/O 풀에서 실행한다.
+
+## 쓰레드 생성 ##
+async def create_thread():
+    if ASSISTANT_USE_ASYNC:
+        return await get_async_client().beta.threads.create()
+    return await io_pool.run(get_client().beta.threads.create)
+
+## 쓰레드 삭제 ##
+async def delete_thread(thread_id: str):
+    if ASSISTANT_USE_ASYNC:
+        return await get_async_client().beta.threads.delete(thread_id)
+    return await io_pool.run(get_client().beta.threads.delete, thread_id)
+
+## 사용자 메세지 추가 ##
+async def create_message(thread_id: str, content: str, metadata: Optional[dict] = None):
+    kwargs = {"thread_id": thread_id, "role": "user", "content": content}
+    if metadata is not None:
+        kwargs["metadata"] = metadata
+    if ASSISTANT_USE_ASYNC:
+        return await get_async_client().beta.threads.messages.create(**kwargs)
+    return await io_pool.run(get_client().beta.threads.messages.create, **kwargs)
+
+## 어시스턴트 실행 ##
+async def run_assistant(db: Session, thread_id: str, assistant_id: str, event_sink: Optional[Callable[[str, dict], None]] = None):
+    if ASSISTANT_USE_ASYNC:
+        async with get_async_client().beta.threads.runs.stream(
+            thread_id=thread_id,
+            assistant_id=assistant_id,
+            instructions=__INSTRUCTIONS__,
+            event_handler=AsyncAssistantHandler(db, thread_id, event_sink),
+        ) as stream:
+            await stream.until_done()
+        return
+
+    def run():
+        with get_client().beta.threads.runs.stream(
+            thread_id=thread_id,
+            assistant_id=assistant_id,
+            instructions=__INSTRUCTIONS__,
+            event_handler=AssistantHandler(db, thread_id, event_sink),
+        ) as stream:
+            stream.until_done()
+
+    # 동기 클라이언트는 이벤트 루프를 막지 않도록 외부 I/O 풀에서 실행
+    await io_pool.run(run)
@@ -0,0 +1,56 @@
+import asyncio, json
+
+from typing import Any, AsyncIterator, Optional
+
+from database import SessionLocal
+from .runner import run_assistant
+
+# 스트림 종료 표시
+_STREAM_END = object()
+
+# 진행 중인 비동기 실행 태스크
+_background_runs = set()
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",   # nginx 프록시 버퍼링 방지
+}
+
+## SSE 메세지 포맷 ##
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+## 어시스턴트 실행을 SSE 이벤트로 전달 ##
+# 실행은 백그라운드 태스크에서 run_assistant로 진행하고, 핸들러 이벤트를 asyncio 큐로 넘겨받아 바로 흘려보낸다.
+# 클라이언트가 끊어지더라도 실행은 끝까지 진행되어 최종 메세지는 DB에 기록된다.
+# 응답 기록 세션에는 사용자/쓰레드를 지정해 두어, 스트림이 끝난 직후의 조회도 주 DB에서 읽도록 한다. (read-your-writes)
+async def stream_assistant_run(thread_id: str, assistant_id: str, user_id: Optional[int] = None) -> AsyncIterator[str]:
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data: dict):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    async def run():
+        db = SessionLocal(info={"user_id": user_id, "thread_id": thread_id})
+        try:
+            await run_assistant(db, thread_id, assistant_id, event_sink=emit)
+        except Exception as e:
+            emit("error", {"message": str(e)})
+        finally:
+            db.close()
+            loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+    # 클라이언트 연결이 끊어져도 실행이 끝날 때까지 태스크 참조를 유지
+    # (동기 모드에서는 run_assistant가 외부 I/O 풀에서 실행하므로 따로 스레드를 만들지 않는다)
+    task = asyncio.ensure_future(run())
+    _background_runs.add(task)
+    task.add_done_callback(_background_runs.discard)
+
+    while True:
+        item = await queue.get()
+        if item is _STREAM_END:
+            break
+        event, data = item
+        yield format_sse(event, data)
+    yield format_sse("done", {})
@@ -0,0 +1,137 @@
+import asyncio, os, threading, time
+
+from collections import deque
+
+from .event_handler import get_client
+
+# 미리 만들어 둘 OpenAI 쓰레드 수 (0이면 사용하지 않음)
+ASSISTANT_THREAD_POOL_SIZE = int(os.getenv("ASSISTANT_THREAD_POOL_SIZE", "4"))
+
+## OpenAI 쓰레드 풀 ##
+# 첫 메세지나 운동 프로그램 설계 시 쓰레드 생성 왕복을 없애기 위해 빈 쓰레드를 미리 만들어 둔다.
+# 쓰레드를 꺼내면 백그라운드 스레드가 설정한 크기까지 다시 채운다.
+# 종료 시 drain()으로 채우기를 멈추고 쓰지 않은 쓰레드를 삭제한다. (워커가 재시작될 때마다 OpenAI에 빈 쓰레드가 쌓이지 않도록)
+class AssistantThreadPool:
+    def __init__(self, size: int = ASSISTANT_THREAD_POOL_SIZE):
+        self.size = size
+        self._threads = deque()
+        self._lock = threading.Lock()
+        self._refill_event = threading.Event()
+        self._worker = None
+        self._stopped = False
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.errors = 0
+        self.drained = 0
+
+    def start(self):
+        if self.size <= 0:
+            return
+        with self._lock:
+            if self._worker is not None or self._stopped:
+                return
+            self._worker = threading.Thread(target=self._refill_loop, name="assistant-thread-pool", daemon=True)
+            self._worker.start()
+        self._refill_event.set()
+
+    def _refill_loop(self):
+        backoff = 1.0
+        while not self._stopped:
+            self._refill_event.wait()
+            self._refill_event.clear()
+            while not self._stopped and len(self._threads) < self.size:
+                try:
+                    thread = get_client().beta.threads.create()
+                except Exception as e:
+                    self.errors += 1
+                    print(f"[AssistantThreadPool] 쓰레드 생성 실패: {e}")
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 60.0)
+                    continue
+                backoff = 1.0
+                with self._lock:
+                    self.created += 1
+                    if not self._stopped:
+                        self._threads.append(thread.id)
+                        continue
+                # 생성 중에 종료가 시작되었으면 풀에 넣지 않고 바로 삭제
+                self._delete_sync(thread.id)
+
+    def _delete_sync(self, thread_id: str):
+        try:
+            get_client().beta.threads.delete(thread_id)
+            with self._lock:
+                self.drained += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"[AssistantThreadPool] 쓰레드 삭제 실패 {thread_id}: {e}")
+
+    ## 쓰레드 꺼내기 ##
+    # 풀이 비어 있으면 None을 반환하며, 호출부에서 직접 생성한다.
+    def take(self):
+        if self.size <= 0 or self._stopped:
+            return None
+        self.start()
+        with self._lock:
+            thread_id = self._threads.popleft() if self._threads else None
+            if thread_id is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        self._refill_event.set()
+        return thread_id
+
+    ## 쓰레드 ID 얻기 (동기) ##
+    def acquire_sync(self) -> str:
+        thread_id = self.take()
+        if thread_id is None:
+            thread_id = get_client().beta.threads.create().id
+        return thread_id
+
+    ## 쓰레드 ID 얻기 (비동기) ##
+    async def acquire(self) -> str:
+        from .runner import create_thread
+
+        thread_id = self.take()
+        if thread_id is None:
+            thread_id = (await create_thread()).id
+        return thread_id
+
+    ## 종료 시 비우기 ##
+    # 채우기를 멈추고, 꺼내지 않은 쓰레드를 모두 삭제한다. (앱 shutdown 이벤트에서 호출)
+    async def drain(self) -> int:
+        from .runner import delete_thread
+
+        with self._lock:
+            self._stopped = True
+            thread_ids = list(self._threads)
+            self._threads.clear()
+        self._refill_event.set()
+
+        results = await asyncio.gather(*(delete_thread(thread_id) for thread_id in thread_ids), return_exceptions=True)
+        deleted = 0
+        for thread_id, result in zip(thread_ids, results):
+            if isinstance(result, Exception):
+                self.errors += 1
+                print(f"[AssistantThreadPool] 쓰레드 삭제 실패 {thread_id}: {result}")
+            else:
+                deleted += 1
+        with self._lock:
+            self.drained += deleted
+        return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "available": len(self._threads),
+                "hits": self.hits,
+                "misses": self.misses,
+                "created": self.created,
+                "drained": self.drained,
+                "errors": self.errors,
+                "stopped": self._stopped,
+            }
+
+thread_pool = AssistantThreadPool()
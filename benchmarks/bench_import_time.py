@@ -0,0 +1,47 @@
+"""
+애플리케이션 import 시간 측정 (워커 콜드 스타트)
+
+새 프로세스에서 `import main` 에 걸리는 시간을 여러 번 재고, 최솟값이 예산을 넘으면 실패 코드로 종료합니다.
+import 시점에는 DB, OpenAI, ML 서버에 연결하지 않아야 하므로 접속 정보가 없어도 통과해야 합니다.
+
+    python benchmarks/bench_import_time.py [--repeat 5] [--budget 2.0]
+    python -m pytest tests/test_import_time.py
+
+IMPORT_TIME_BUDGET 환경 변수로도 예산(초)을 지정할 수 있습니다.
+"""
+import argparse, os, subprocess, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "2.0"))
+
+MEASURE = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def measure_once() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=IMPORT_TIME_BUDGET)
+    args = parser.parse_args()
+
+    timings = [measure_once() for _ in range(args.repeat)]
+    best = min(timings)
+    print(f"import main: best={best:.3f}s avg={sum(timings) / len(timings):.3f}s budget={args.budget:.3f}s")
+    if best > args.budget:
+        print("import 시간이 예산을 초과했습니다.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
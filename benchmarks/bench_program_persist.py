@@ -0,0 +1,149 @@
+"""
+운동 프로그램 저장 벤치마크 (행/초)
+
+기존 방식(행마다 add + commit + refresh)과 save_training_program(단일 트랜잭션, 계층별 다중 행 INSERT)을 비교합니다.
+
+    python benchmarks/bench_program_persist.py [--days 4] [--exercises 6] [--repeat 20]
+
+BENCH_DB_URL을 지정하면 해당 DB에 테이블을 만들어 측정하고, 지정하지 않으면 임시 SQLite 파일을 사용합니다.
+"""
+import argparse, json, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import User, TrainingProgram, TrainingCycle, ExerciseSet, ExerciseDetail
+from functions import save_training_program
+
+
+def build_program(days: int, exercises: int) -> dict:
+    return {
+        "training_cycle_length": days,
+        "constraints": {"injuries": [], "equipment": ["barbell", "dumbbell"]},
+        "notes": "benchmark",
+        "cycles": [
+            {
+                "day_index": day,
+                "exercise_type": day % 2,
+                "sets": [
+                    {
+                        "focus_area": "upper" if day % 2 else "lower",
+                        "exercises": [
+                            {
+                                "name": f"exercise-{day}-{i}",
+                                "sets": 4,
+                                "reps": 10,
+                                "unit": "kg",
+                                "weight_type": "absolute",
+                                "weight_value": 40.0,
+                                "rest": 90
+                            }
+                            for i in range(exercises)
+                        ]
+                    }
+                ]
+            }
+            for day in range(1, days + 1)
+        ]
+    }
+
+
+def count_rows(program: dict) -> int:
+    rows = 1 + len(program["cycles"])
+    for cycle in program["cycles"]:
+        rows += len(cycle["sets"])
+        for ex_set in cycle["sets"]:
+            rows += len(ex_set["exercises"])
+    return rows
+
+
+# 기존 저장 방식 (행마다 커밋)
+def save_training_program_legacy(db, user_id: int, program: dict):
+    new_program = TrainingProgram(
+        user_id=user_id,
+        training_cycle_length=program["training_cycle_length"],
+        constraints=json.dumps(program["constraints"], ensure_ascii=False),
+        notes=program["notes"]
+    )
+    db.add(new_program)
+    db.commit()
+    db.refresh(new_program)
+
+    for cycle in program["cycles"]:
+        new_cycle = TrainingCycle(program_id=new_program.id, day_index=cycle["day_index"], exercise_type=cycle["exercise_type"])
+        db.add(new_cycle)
+        db.commit()
+        db.refresh(new_cycle)
+
+        for ex_set in cycle["sets"]:
+            new_ex_set = ExerciseSet(program_id=new_program.id, cycle_id=new_cycle.id, focus_area=ex_set["focus_area"])
+            db.add(new_ex_set)
+            db.commit()
+            db.refresh(new_ex_set)
+
+            for detail in ex_set["exercises"]:
+                new_detail = ExerciseDetail(
+                    set_id=new_ex_set.id,
+                    name=detail["name"],
+                    sets=detail["sets"],
+                    reps=detail["reps"],
+                    unit=detail["unit"],
+                    weight_type=detail.get("weight_type"),
+                    weight_value=detail.get("weight_value"),
+                    rest=detail["rest"]
+                )
+                db.add(new_detail)
+                db.commit()
+                db.refresh(new_detail)
+
+
+def measure(SessionLocal, user_id: int, save, program: dict, repeat: int) -> float:
+    rows = count_rows(program) * repeat
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            save(db, user_id, program)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=4)
+    parser.add_argument("--exercises", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db_url = os.getenv("BENCH_DB_URL")
+    if not db_url:
+        db_file = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+        db_url = f"sqlite:///{db_file}"
+
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with SessionLocal() as db:
+        user = User(user_uuid=os.urandom(16).hex()[:36], user_name="bench", user_password="-", phone_number="0", email="bench@example.com")
+        db.add(user)
+        db.commit()
+        user_id = user.user_id
+
+    program = build_program(args.days, args.exercises)
+    print(f"db={engine.url.get_backend_name()} rows/program={count_rows(program)} repeat={args.repeat}")
+
+    legacy = measure(SessionLocal, user_id, save_training_program_legacy, program, args.repeat)
+    bulk = measure(SessionLocal, user_id, save_training_program, program, args.repeat)
+    print(f"legacy (row-by-row commit) : {legacy:10.1f} rows/sec")
+    print(f"save_training_program      : {bulk:10.1f} rows/sec")
+    print(f"speedup                    : {bulk / legacy:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,20 @@
 from .database import (
     get_db,
+    get_async_db,
+    get_read_db,
+    get_async_read_db,
     Base,
-    engine
-    )
\ No newline at end of file
+    get_engine,
+    get_async_engine,
+    get_read_engine,
+    get_async_read_engine,
+    reset_engines,
+    SessionLocal,
+    AsyncSessionLocal,
+    ReadSessionLocal,
+    AsyncReadSessionLocal
+    )
+from .pool import pool_status, warm_up_pool, awarm_up_pool
+from .replica import recent_writes, bind_read_user
+from .query_stats import QueryStatsMiddleware, current_query_stats
+from .slow_query import slow_query_log
@@ -1,11 +1,15 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError, DataError, InvalidRequestError, NoResultFound, MultipleResultsFound, OperationalError
-from fastapi import HTTPException
-from requests import Session
+from fastapi import HTTPException, Request
 from dotenv import load_dotenv 
-import os
+import os, threading
+
+from .pool import TimedQueuePool, TimedAsyncQueuePool, pool_options, install_idle_pre_ping
+from .replica import DB_READ_HOST, DB_READ_PORT, ReadRoutingSession
+from .slow_query import install_slow_query_log
 
 load_dotenv(override=True)
 user = os.getenv("DB_USER")
@@ -16,32 +20,114 @@ db = os.getenv("DB_NAME")
 
 
 DB_URL = f'mysql+mysqlconnector://{user}:{passwd}@{host}:{port}/{db}?charset=utf8'
+ASYNC_DB_URL = f'mysql+aiomysql://{user}:{passwd}@{host}:{port}/{db}?charset=utf8'
+READ_DB_URL = f'mysql+mysqlconnector://{user}:{passwd}@{DB_READ_HOST}:{DB_READ_PORT or port}/{db}?charset=utf8'
+ASYNC_READ_DB_URL = f'mysql+aiomysql://{user}:{passwd}@{DB_READ_HOST}:{DB_READ_PORT or port}/{db}?charset=utf8'
 
 ## db 연결 방법 정의 ##
-engine = create_engine(DB_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False,autoflush=False, bind=engine)
+# 엔진은 처음 사용할 때 만든다. (import 시점에 드라이버 로딩, DB 연결을 하지 않음)
+# 풀 크기, 오버플로우, 대기 시간, recycle, pre-ping 방식은 환경 변수로 설정 (database/pool.py)
 Base = declarative_base()
 
+_engines = {}
+_engines_lock = threading.Lock()
+
+def _lazy_engine(name: str, factory):
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = _engines[name] = factory()
+    return engine
+
+def _create_engine(url: str):
+    engine = create_engine(url, **pool_options(TimedQueuePool))
+    install_idle_pre_ping(engine)
+    install_slow_query_log(engine)
+    return engine
+
+# 비동기 엔진의 EXPLAIN은 같은 DB의 동기 엔진으로 수행
+def _create_async_engine(url: str, explain_engine):
+    engine = create_async_engine(url, **pool_options(TimedAsyncQueuePool))
+    install_idle_pre_ping(engine)
+    install_slow_query_log(engine, explain_engine=explain_engine)
+    return engine
+
+def get_engine():
+    return _lazy_engine("engine", lambda: _create_engine(DB_URL))
+
+## 비동기 db 연결 방법 정의 (async 라우트용) ##
+def get_async_engine():
+    return _lazy_engine("async_engine", lambda: _create_async_engine(ASYNC_DB_URL, get_engine))
+
+## 읽기 전용 복제본 연결 (DB_READ_HOST 미설정 시 주 DB 사용) ##
+def get_read_engine():
+    if not DB_READ_HOST:
+        return get_engine()
+    return _lazy_engine("read_engine", lambda: _create_engine(READ_DB_URL))
+
+def get_async_read_engine():
+    if not DB_READ_HOST:
+        return get_async_engine()
+    return _lazy_engine("async_read_engine", lambda: _create_async_engine(ASYNC_READ_DB_URL, get_read_engine))
+
+## 엔진 초기화 ##
+# fork 된 워커가 부모의 연결을 공유하지 않도록 기존 엔진을 버린다. (연결은 닫지 않음)
+def reset_engines():
+    with _engines_lock:
+        for engine in _engines.values():
+            getattr(engine, "sync_engine", engine).dispose(close=False)
+        _engines.clear()
+
+
+## 세션 ##
+# 세션은 실행 시점에 엔진을 찾는다.
+class PrimarySession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        return get_engine()
+
+class AsyncPrimarySyncSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        return get_async_engine().sync_engine
+
+class ReadSession(ReadRoutingSession):
+    primary_engine = staticmethod(get_engine)
+    replica_engine = staticmethod(get_read_engine)
+
+class AsyncReadSyncSession(ReadRoutingSession):
+    primary_engine = staticmethod(lambda: get_async_engine().sync_engine)
+    replica_engine = staticmethod(lambda: get_async_read_engine().sync_engine)
+
+SessionLocal = sessionmaker(class_=PrimarySession, autocommit=False, autoflush=False)
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, sync_session_class=AsyncPrimarySyncSession, autocommit=False, autoflush=False, expire_on_commit=False)
+ReadSessionLocal = sessionmaker(class_=ReadSession, autocommit=False, autoflush=False)
+AsyncReadSessionLocal = async_sessionmaker(class_=AsyncSession, sync_session_class=AsyncReadSyncSession, autocommit=False, autoflush=False, expire_on_commit=False)
+
 ## db 연결하는 함수 ##
-def get_db():
-    db = SessionLocal()
+# 요청 정보(request.state.user_id)는 커밋 시 최근 쓰기 사용자 기록에 쓰인다.
+def get_db(request: Request):
+    db = SessionLocal(info={"request_state": request.state})
+    try:
+        yield db
+    finally:
+        db.close()
+
+## 비동기 db 연결하는 함수 ##
+async def get_async_db(request: Request):
+    async with AsyncSessionLocal(info={"request_state": request.state}) as db:
+        yield db
+
+## 읽기용 db 연결하는 함수 ##
+# 조회는 복제본으로, 쓰기와 최근에 쓴 사용자의 조회는 주 DB로 보낸다.
+def get_read_db(request: Request):
+    db = ReadSessionLocal(info={"request_state": request.state})
     try:
         yield db
     finally:
         db.close()
 
+async def get_async_read_db(request: Request):
+    async with AsyncReadSessionLocal(info={"request_state": request.state}) as db:
+        yield db
 
-try:
-    # 연결 시도
-    print(DB_URL)
-    with engine.connect() as connection:
-        print("데이터베이스에 연결되었습니다.")
-        
-        # 쿼리 실행 예시
-        query = "SELECT * FROM table_name LIMIT 5"
-        
-        # 결과 출력
-        print("쿼리 실행 완료")
-        
-except Exception as e:
-    print("데이터베이스 연결 실패:", e)
\ No newline at end of file
@@ -0,0 +1,58 @@
+# 주요 조회 쿼리의 실행 계획(EXPLAIN) 점검
+# 인덱스가 빠져 전체 테이블 스캔(type = ALL)이 발생하는 쿼리가 있으면 실패 코드로 종료합니다.
+#
+#   alembic upgrade head
+#   python -m database.explain_check
+
+import sys
+
+from sqlalchemy import select, desc, text
+
+from database.database import get_engine
+from models import User, RefreshToken, AssistantThread, AssistantMessage, BodyMeasurementRecord, TrainingProgram, TrainingCycle, ExerciseSet, ExerciseDetail
+
+
+# 라우트에서 사용하는 조회 쿼리 (값은 실행 계획 확인용 임의값)
+HOT_QUERIES = {
+    "user_by_email": select(User).where(User.email == "user@example.com"),
+    "user_by_phone_number": select(User).where(User.phone_number == "01000000000"),
+    "user_by_id": select(User).where(User.user_id == 1),
+    "refresh_token_by_hash": select(RefreshToken).where(RefreshToken.token_hash == "0" * 64),
+    "refresh_token_by_user": select(RefreshToken).where(RefreshToken.user_id == 1),
+    "thread_by_user": select(AssistantThread).where(AssistantThread.user_id == 1),
+    "messages_by_thread": select(AssistantMessage).where(AssistantMessage.thread_id == "thread").order_by(AssistantMessage.created_at),
+    "latest_message": select(AssistantMessage).where(AssistantMessage.thread_id == "thread").order_by(desc(AssistantMessage.created_at)).limit(1),
+    "latest_body_measurement": select(BodyMeasurementRecord).where(BodyMeasurementRecord.user_id == 1).order_by(desc(BodyMeasurementRecord.recoded_at)).limit(1),
+    "latest_train_program": select(TrainingProgram).where(TrainingProgram.user_id == 1).order_by(desc(TrainingProgram.created_at)).limit(1),
+    "cycles_by_program": select(TrainingCycle).where(TrainingCycle.program_id == 1),
+    "sets_by_program": select(ExerciseSet).where(ExerciseSet.program_id == 1),
+    "details_by_set": select(ExerciseDetail).where(ExerciseDetail.set_id == 1),
+    "user_by_thread": select(User).join(AssistantThread, AssistantThread.user_id == User.user_id).where(AssistantThread.thread_id == "thread"),
+}
+
+
+def explain(connection, statement):
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    result = connection.execute(text("EXPLAIN " + sql))
+    return [dict(row._mapping) for row in result]
+
+
+def check_query_plans(queries=HOT_QUERIES):
+    # 전체 테이블 스캔이 발생한 쿼리 이름 목록 반환
+    full_scans = []
+    with get_engine().connect() as connection:
+        for name, statement in queries.items():
+            rows = explain(connection, statement)
+            for row in rows:
+                print(f"[EXPLAIN] {name}: table={row.get('table')} type={row.get('type')} key={row.get('key')} rows={row.get('rows')}")
+                if row.get("type") == "ALL":
+                    full_scans.append(name)
+    return full_scans
+
+
+if __name__ == "__main__":
+    full_scans = check_query_plans()
+    if full_scans:
+        print("전체 테이블 스캔이 발생한 쿼리:", ", ".join(sorted(set(full_scans))))
+        sys.exit(1)
+    print("모든 쿼리가 인덱스를 사용합니다.")
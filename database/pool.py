@@ -0,0 +1,160 @@
+import os, threading, time
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+## 커넥션 풀 설정 ##
+# 풀은 엔진(주 DB 동기/비동기, 읽기 복제본 동기/비동기)마다 따로 있고 워커 프로세스마다 따로 있다.
+# 워커당 최대 연결 수 = (DB_POOL_SIZE + DB_MAX_OVERFLOW) x 엔진 수
+#   주 DB만 쓰면 (10 + 20) x 2 = 60, 복제본(DB_READ_HOST)을 쓰면 주 DB와 복제본에 각각 60
+# 전체 = 워커당 최대 연결 수 x WEB_CONCURRENCY 가 MySQL max_connections보다 충분히 작아야 한다.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))    # MySQL wait_timeout 보다 짧게
+# always: 꺼낼 때마다 ping, idle: 일정 시간 쉬었던 연결만 ping, off: ping 하지 않음
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "idle")
+DB_POOL_PRE_PING_IDLE = float(os.getenv("DB_POOL_PRE_PING_IDLE", "60"))
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "2"))
+
+
+## 커넥션 대기 시간 통계 ##
+class PoolWaitStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+## 대기 시간을 기록하는 풀 ##
+# 풀에서 커넥션을 얻기까지 걸린 시간(새 연결 생성 포함)을 기록한다.
+class _TimedPoolMixin:
+    wait_stats: PoolWaitStats = None
+
+    def _do_get(self):
+        if self.wait_stats is None:
+            self.wait_stats = PoolWaitStats()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+    # engine.dispose() 등으로 풀을 다시 만들어도 통계는 유지
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(poolclass) -> dict:
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING == "always",
+    }
+
+
+## idle 모드 pre-ping ##
+# 매 요청마다 ping 왕복을 하지 않고, 반납된 뒤 DB_POOL_PRE_PING_IDLE 초 이상 쉬었던 연결만 확인한다.
+def install_idle_pre_ping(engine):
+    if DB_POOL_PRE_PING != "idle":
+        return
+    from sqlalchemy.exc import DisconnectionError
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    dialect = sync_engine.dialect
+
+    @event.listens_for(sync_engine, "checkin")
+    def _mark_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(sync_engine, "checkout")
+    def _ping_idle(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < DB_POOL_PRE_PING_IDLE:
+            return
+        try:
+            alive = dialect.do_ping(dbapi_connection)
+        except Exception:
+            alive = False
+        if not alive:
+            # 풀이 이 연결을 버리고 새 연결로 다시 시도한다.
+            raise DisconnectionError("유휴 연결 확인 실패")
+
+
+def pool_status(engine) -> dict:
+    pool = getattr(engine, "sync_engine", engine).pool
+    wait_stats = pool.wait_stats.stats() if getattr(pool, "wait_stats", None) else PoolWaitStats().stats()
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "timeout": DB_POOL_TIMEOUT,
+        "recycle": DB_POOL_RECYCLE,
+        "pre_ping": DB_POOL_PRE_PING,
+        **wait_stats,
+    }
+
+
+## 커넥션 풀 예열 ##
+# 첫 요청들이 연결 생성 비용을 부담하지 않도록 기동 시 미리 연결을 만들어 둔다.
+def warm_up_pool(engine, count: int = DB_POOL_WARMUP) -> int:
+    count = min(count, DB_POOL_SIZE)
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.connect())
+    except Exception as e:
+        print(f"[DB Pool] 예열 실패: {e}")
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+async def awarm_up_pool(async_engine, count: int = DB_POOL_WARMUP) -> int:
+    count = min(count, DB_POOL_SIZE)
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(await async_engine.connect())
+    except Exception as e:
+        print(f"[DB Pool] 비동기 예열 실패: {e}")
+    finally:
+        for connection in connections:
+            await connection.close()
+    return len(connections)
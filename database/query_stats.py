@@ -0,0 +1,95 @@
+import os, re, time
+
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+## 요청별 쿼리 통계 설정 ##
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "1") == "1"
+QUERY_STATS_HEADERS = os.getenv("QUERY_STATS_HEADERS", "1") == "1"
+QUERY_STATS_LOG = os.getenv("QUERY_STATS_LOG", "0") == "1"
+# 한 요청에서 같은 형태의 쿼리가 이 횟수를 넘으면 N+1 의심으로 경고
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%s|\?|%\(\w+\)s|:\w+)\s*,?)+\)")
+_WHITESPACE = re.compile(r"\s+")
+
+## 쿼리 형태 ##
+# 바인딩 값은 이미 분리되어 있으므로 공백과 IN 목록 길이만 정규화한다.
+def statement_shape(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(?)", statement)
+
+
+class RequestQueryStats:
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    ## N+1 의심 쿼리 (형태, 반복 횟수) ##
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+# 모든 엔진(비동기 엔진의 sync_engine 포함)의 쿼리 실행 시간을 현재 요청 통계에 기록한다.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = conn.info.get("query_started_at")
+    if stats is None or not started:
+        return
+    stats.record(statement, time.perf_counter() - started.pop())
+
+
+## 요청별 쿼리 통계 미들웨어 ##
+# 응답 헤더: X-DB-Query-Count, X-DB-Query-Time-ms, X-DB-Repeated-Queries
+# 같은 형태의 쿼리가 N_PLUS_ONE_THRESHOLD 번을 넘게 반복되면 경고를 출력한다.
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(f"{scope['method']} {scope['path']}")
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start" and QUERY_STATS_HEADERS:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append((b"x-db-query-time-ms", f"{stats.total_time * 1000:.1f}".encode()))
+                headers.append((b"x-db-repeated-queries", str(len(stats.repeated())).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            for shape, count in stats.repeated():
+                print(f"[N+1] {stats.path}: {count}회 반복 - {shape[:200]}")
+            if QUERY_STATS_LOG:
+                print(f"[query_stats] {stats.path} queries={stats.count} db_time={stats.total_time * 1000:.1f}ms")
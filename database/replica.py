@@ -0,0 +1,119 @@
+import os, threading, time
+
+from sqlalchemy import event, Insert, Update, Delete
+from sqlalchemy.orm import Session
+
+## 읽기 전용 복제본 설정 ##
+# DB_READ_HOST가 없으면 읽기 세션도 주 DB를 사용한다.
+DB_READ_HOST = os.getenv("DB_READ_HOST")
+DB_READ_PORT = os.getenv("DB_READ_PORT")
+# 쓰기 직후 이 시간(초) 동안은 해당 사용자의 읽기를 주 DB로 보낸다. (복제 지연 대비)
+DB_READ_YOUR_WRITES_WINDOW = float(os.getenv("DB_READ_YOUR_WRITES_WINDOW", "5"))
+
+
+## 최근 쓰기 기록 ##
+# key: ("user", user_id) 또는 ("thread", thread_id)
+class RecentWrites:
+    def __init__(self, window: float = DB_READ_YOUR_WRITES_WINDOW):
+        self.window = window
+        self._writes = {}
+        self._lock = threading.Lock()
+        self.primary_reads = 0
+        self.replica_reads = 0
+
+    def mark(self, key):
+        now = time.monotonic()
+        with self._lock:
+            self._writes[key] = now + self.window
+            if len(self._writes) > 10000:
+                self._writes = {k: until for k, until in self._writes.items() if until > now}
+
+    def is_recent(self, key) -> bool:
+        with self._lock:
+            until = self._writes.get(key)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._writes[key]
+                return False
+            return True
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "replica_enabled": bool(DB_READ_HOST),
+                "window": self.window,
+                "recent_writers": sum(1 for until in self._writes.values() if until > now),
+                "primary_reads": self.primary_reads,
+                "replica_reads": self.replica_reads,
+            }
+
+recent_writes = RecentWrites()
+
+
+def _read_scope_keys(session: Session):
+    keys = []
+    state = session.info.get("request_state")
+    user_id = session.info.get("user_id")
+    if user_id is None:
+        user_id = getattr(state, "user_id", None)
+    if user_id is not None:
+        keys.append(("user", int(user_id)))
+    thread_id = session.info.get("thread_id")
+    if thread_id is not None:
+        keys.append(("thread", thread_id))
+    return keys
+
+
+## 읽기 라우팅 세션 ##
+# 조회는 복제본으로 보내고, 쓰기(flush)와 쓰기 이후의 조회, 최근에 쓴 사용자의 조회는 주 DB로 보낸다.
+# 하위 클래스에서 primary, replica 엔진을 반환하는 함수를 지정한다. (비동기 세션은 sync_engine)
+class ReadRoutingSession(Session):
+    primary_engine = None
+    replica_engine = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary, replica = self.primary_engine(), self.replica_engine()
+        if primary is replica:
+            return primary
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info["wrote"] = True
+            return primary
+        if self.info.get("wrote") or any(recent_writes.is_recent(key) for key in _read_scope_keys(self)):
+            recent_writes.primary_reads += 1
+            return primary
+        recent_writes.replica_reads += 1
+        return replica
+
+
+## 읽기 범위 지정 ##
+# 요청 정보 없이 만든 세션(도구 함수 등)에서 조회 대상 사용자를 알게 되면 호출한다.
+def bind_read_user(db: Session, user_id: int):
+    db.info["user_id"] = user_id
+
+
+# 커밋된 쓰기의 사용자/쓰레드를 기록한다.
+# 변경된 객체의 user_id/thread_id와 함께, 세션에 지정된 사용자/쓰레드(요청 정보, bind_read_user, info)도 기록한다.
+@event.listens_for(Session, "after_flush")
+def _collect_writes(session, flush_context):
+    if not DB_READ_HOST:
+        return
+    keys = session.info.setdefault("written_keys", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        user_id = obj.__dict__.get("user_id")
+        if user_id is not None:
+            keys.add(("user", int(user_id)))
+        thread_id = obj.__dict__.get("thread_id")
+        if thread_id is not None:
+            keys.add(("thread", thread_id))
+    keys.update(_read_scope_keys(session))
+
+@event.listens_for(Session, "after_commit")
+def _mark_writes(session):
+    for key in session.info.pop("written_keys", ()):
+        recent_writes.mark(key)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(session):
+    session.info.pop("written_keys", None)
@@ -0,0 +1,131 @@
+import os, threading, time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import event
+
+from .query_stats import current_query_stats, statement_shape
+
+## 느린 쿼리 로그 설정 ##
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))    # 0 이하면 사용하지 않음
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+# 같은 형태의 쿼리는 이 시간(초) 동안 EXPLAIN을 다시 수행하지 않는다.
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+
+
+## 파라미터 가리기 ##
+# 숫자/날짜/None 은 그대로 두고, 문자열과 바이트는 길이만 남긴다. (비밀번호, 토큰, 이메일 등)
+def redact_value(value):
+    if value is None or isinstance(value, (bool, int, float, datetime)):
+        return value if not isinstance(value, datetime) else value.isoformat()
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+def redact_parameters(parameters):
+    if isinstance(parameters, dict):
+        return {key: redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        # executemany는 [(..), (..)] 형태
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return [redact_parameters(row) for row in parameters[:3]] + ([f"... {len(parameters)} rows"] if len(parameters) > 3 else [])
+        return [redact_value(value) for value in parameters]
+    return redact_value(parameters)
+
+
+## 느린 쿼리 기록 ##
+# 최근 SLOW_QUERY_LOG_SIZE 개만 메모리에 유지한다.
+class SlowQueryLog:
+    def __init__(self, size: int = SLOW_QUERY_LOG_SIZE):
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._explained_at = {}
+        self._explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        self.total = 0
+
+    def record(self, explain_engine, statement, parameters, duration: float, executemany: bool):
+        stats = current_query_stats()
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration * 1000, 1),
+            "route": stats.path if stats else None,
+            "statement": statement,
+            "parameters": redact_parameters(parameters),
+            "explain": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.total += 1
+        print(f"[slow_query] {entry['duration_ms']}ms {entry['route']} {statement_shape(statement)[:200]}")
+
+        if SLOW_QUERY_EXPLAIN and explain_engine is not None and not executemany and self._should_explain(statement):
+            # 요청 처리를 막지 않도록 별도 스레드에서 EXPLAIN을 수행한다.
+            self._explain_executor.submit(self._explain, explain_engine, entry, statement, parameters)
+
+    def _should_explain(self, statement: str) -> bool:
+        if not statement.lstrip().upper().startswith("SELECT"):
+            return False
+        shape = statement_shape(statement)
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(shape)
+            if last is not None and now - last < SLOW_QUERY_EXPLAIN_INTERVAL:
+                return False
+            self._explained_at[shape] = now
+        return True
+
+    def _explain(self, explain_engine, entry: dict, statement: str, parameters):
+        try:
+            if callable(explain_engine):
+                explain_engine = explain_engine()
+            with explain_engine.connect() as connection:
+                result = connection.exec_driver_sql("EXPLAIN " + statement, parameters)
+                plan = [{key: (value if isinstance(value, (int, float)) or value is None else str(value)) for key, value in row._mapping.items()} for row in result]
+        except Exception as e:
+            plan = {"error": str(e)}
+        with self._lock:
+            entry["explain"] = plan
+
+    def entries(self, limit: int = 50) -> list:
+        with self._lock:
+            return list(self._entries)[-limit:][::-1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+                "total": self.total,
+                "buffered": len(self._entries),
+            }
+
+slow_query_log = SlowQueryLog()
+
+
+## 엔진에 느린 쿼리 로그 연결 ##
+# explain_engine: EXPLAIN을 실행할 동기 엔진 또는 엔진을 반환하는 함수 (비동기 엔진은 같은 DB의 동기 엔진을 지정)
+def install_slow_query_log(engine, explain_engine=None):
+    if SLOW_QUERY_THRESHOLD_MS <= 0:
+        return
+    sync_engine = getattr(engine, "sync_engine", engine)
+    explain_engine = explain_engine if explain_engine is not None else sync_engine
+    threshold = SLOW_QUERY_THRESHOLD_MS / 1000
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _check_duration(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("slow_query_started_at")
+        if not started:
+            return
+        duration = time.perf_counter() - started.pop()
+        if duration >= threshold and not statement.lstrip().upper().startswith("EXPLAIN"):
+            slow_query_log.record(explain_engine, statement, parameters, duration, executemany)
@@ -6,4 +6,34 @@ from .functions import (
     estimate_smm_lee,
     calculate_smi,
     generate_user_train_program,
-)
\ No newline at end of file
+    design_training_program,
+    submit_program_generation,
+    build_designer_metadata,
+    PROGRAM_GENERATION_JOB,
+)
+
+from .program_store import (
+    save_training_program,
+)
+
+from .cache import (
+    ToolResultCache,
+    train_program_cache,
+    invalidate_user_train_program,
+)
+
+from .speculative import (
+    SpeculativeProgramStore,
+    speculative_programs,
+    program_input_fingerprint,
+    DEFAULT_PROGRAM_REQUEST,
+)
+
+from .queries import (
+    aget_thread_by_user,
+    aget_threads_by_user,
+    aget_messages_by_thread,
+    aget_latest_message,
+    aget_latest_body_measurement,
+    aget_latest_train_program,
+)
@@ -0,0 +1,144 @@
+import os, threading, time
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import TrainingProgram, TrainingCycle, ExerciseSet, ExerciseDetail
+
+# 사용자별 도구 결과 캐시 설정 (유효 시간(초), 최대 사용자 수)
+TRAIN_PROGRAM_CACHE_TTL = float(os.getenv("TRAIN_PROGRAM_CACHE_TTL", "300"))
+TRAIN_PROGRAM_CACHE_SIZE = int(os.getenv("TRAIN_PROGRAM_CACHE_SIZE", "1024"))
+
+## 사용자별 도구 결과 캐시 ##
+# user_id -> (프로그램 버전, 직렬화된 결과, 만료 시각)
+# 프로그램이 저장되면 버전이 올라가며, 조회 도중 버전이 바뀐 결과는 저장하지 않는다.
+# 버전은 (전체 세대, 사용자 버전)이며, 전체 무효화는 세대를 올려 모든 사용자의 버전을 바꾼다.
+class ToolResultCache:
+    def __init__(self, ttl: float = TRAIN_PROGRAM_CACHE_TTL, max_entries: int = TRAIN_PROGRAM_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[int, Any, float]]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _version(self, user_id: int) -> Tuple[int, int]:
+        return (self._epoch, self._versions.get(user_id, 0))
+
+    def version(self, user_id: int) -> Tuple[int, int]:
+        with self._lock:
+            return self._version(user_id)
+
+    def get(self, user_id: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                version, result, expires_at = entry
+                if version == self._version(user_id) and expires_at >= time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return result
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def set(self, user_id: int, version: Tuple[int, int], result: Any):
+        with self._lock:
+            if version != self._version(user_id):
+                return
+            self._entries[user_id] = (version, result, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+            self.invalidations += 1
+
+    ## 전체 무효화 (대상 사용자를 알 수 없는 일괄 UPDATE/DELETE) ##
+    def invalidate_all(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+train_program_cache = ToolResultCache()
+
+## 사용자 운동 프로그램 캐시 무효화 ##
+def invalidate_user_train_program(user_id: int):
+    train_program_cache.invalidate(user_id)
+
+
+# ORM으로 프로그램(사이클, 세트, 운동 포함)이 변경되면 커밋 시점에 해당 사용자의 캐시를 무효화한다.
+# 하위 행은 program_id / set_id로 프로그램 소유자를 찾는다.
+# 새 하위 행의 일괄 INSERT는 save_training_program에서 프로그램과 함께만 일어나며, 거기서 직접 무효화한다.
+PROGRAM_MODELS = (TrainingProgram, TrainingCycle, ExerciseSet, ExerciseDetail)
+
+def _program_owner_ids(session, program_ids, set_ids):
+    user_ids = set()
+    if set_ids:
+        program_ids |= set(session.execute(
+            select(ExerciseSet.program_id).where(ExerciseSet.id.in_(set_ids))
+        ).scalars())
+    if program_ids:
+        user_ids |= set(session.execute(
+            select(TrainingProgram.user_id).where(TrainingProgram.id.in_(program_ids))
+        ).scalars())
+    return user_ids
+
+@event.listens_for(Session, "after_flush")
+def _collect_program_writes(session, flush_context):
+    user_ids = session.info.setdefault("train_program_writes", set())
+    program_ids, set_ids = set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, TrainingProgram) and obj.user_id is not None:
+            user_ids.add(obj.user_id)
+        elif isinstance(obj, (TrainingCycle, ExerciseSet)) and obj.program_id is not None:
+            program_ids.add(obj.program_id)
+        elif isinstance(obj, ExerciseDetail) and obj.set_id is not None:
+            set_ids.add(obj.set_id)
+    if program_ids or set_ids:
+        user_ids |= _program_owner_ids(session, program_ids, set_ids)
+
+# 일괄 update()/delete()는 영향받는 사용자를 알 수 없으므로 커밋 시 전체를 무효화한다.
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_program_writes(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in PROGRAM_MODELS:
+        orm_execute_state.session.info["train_program_bulk_write"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_program_writes(session):
+    if session.info.pop("train_program_bulk_write", False):
+        train_program_cache.invalidate_all()
+    for user_id in session.info.pop("train_program_writes", ()):
+        invalidate_user_train_program(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_program_writes(session):
+    session.info.pop("train_program_writes", None)
+    session.info.pop("train_program_bulk_write", None)
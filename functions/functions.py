@@ -3,11 +3,27 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import desc
 
 from models import User, AssistantThread, TrainingProgram, TrainingCycle, ExerciseDetail, ExerciseSet, BodyMeasurementRecord
+from .cache import train_program_cache
+from .program_store import save_training_program
+from .speculative import speculative_programs, normalize_request, DEFAULT_PROGRAM_REQUEST
+from database import SessionLocal, bind_read_user
+from jobs import Job, job_queue
+from typing import Tuple
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import os, json
 from openai import OpenAIError
 
 assistant_exercise_designer_id = os.getenv("ASSISTANT_EXERCISE_DESIGNER_ID")
 
+# 운동 프로그램 생성 작업 종류
+PROGRAM_GENERATION_JOB = "train_program"
+# 도구 호출 안에서 생성 작업을 기다리는 최대 시간(초)
+# 바깥 도구 실행 제한(ASSISTANT_TOOL_TIMEOUT)보다 여유(ASSISTANT_TOOL_WAIT_MARGIN)만큼 먼저 끝나야
+# 일반 시간 초과 오류 대신 작업 ID가 담긴 pending 응답을 돌려줄 수 있다.
+ASSISTANT_TOOL_TIMEOUT = float(os.getenv("ASSISTANT_TOOL_TIMEOUT", "120"))
+ASSISTANT_TOOL_WAIT_MARGIN = float(os.getenv("ASSISTANT_TOOL_WAIT_MARGIN", "5"))
+PROGRAM_JOB_WAIT_TIMEOUT = max(ASSISTANT_TOOL_TIMEOUT - ASSISTANT_TOOL_WAIT_MARGIN, ASSISTANT_TOOL_TIMEOUT / 2)
+
 def estimate_body_fat_percentage(weight_kg: float, height_cm: float, age: int, gender: str = "male") -> float:
     """
     Seong et al. (2017) 최종 모델 1 기반 한국인 대상 BMI 기반 체지방률 추정 공식
@@ -89,6 +105,7 @@ def get_user_train_program(db: Session, thread_id: str, id: str=None):
     """
     주어진 thread_id에 해당하는 사용자의 운동 프로그램을 가져옵니다.
     JSON 형태로 반환됩니다.
+    결과는 사용자별로 캐시되며, 프로그램이 저장되면 무효화됩니다.
 
     :param db: 데이터베이스 세션
     :param thread_id: AssistantThread의 thread_id
@@ -106,6 +123,13 @@ def get_user_train_program(db: Session, thread_id: str, id: str=None):
 
         if not user:
             return {"status": "failed", "message": "사용자를 찾을 수 없습니다."}
+        bind_read_user(db, user.user_id)
+
+        # 캐시 조회 (버전은 조회 전에 읽어 두어야 조회 중 저장된 프로그램을 덮어쓰지 않는다)
+        version = train_program_cache.version(user.user_id)
+        cached = train_program_cache.get(user.user_id)
+        if cached is not None:
+            return cached
 
         # 최신 프로그램 조회
         program = (
@@ -161,7 +185,9 @@ def get_user_train_program(db: Session, thread_id: str, id: str=None):
             "cycles": cycles_data
         }
 
-        return {"status": "success", "data": program_data}
+        result = {"status": "success", "data": program_data}
+        train_program_cache.set(user.user_id, version, result)
+        return result
 
     except SQLAlchemyError as e:
         db.rollback()
@@ -175,6 +201,7 @@ def get_body_measurement_records(db: Session, thread_id: str):
         user = db.query(User).join(AssistantThread).filter(AssistantThread.thread_id == thread_id).first()
         if not user:
             return {"status": "failed", "message": "사용자를 찾을 수 없습니다."}
+        bind_read_user(db, user.user_id)
         record = db.query(BodyMeasurementRecord).filter(BodyMeasurementRecord.user_id == user.user_id).first()
         if not record:
             return {"status": "failed", "message": "신체 측정 기록을 찾을 수 없습니다."}
@@ -213,32 +240,83 @@ def get_body_measurement_records(db: Session, thread_id: str):
     except Exception as e:
         return {"status": "failed", "message": f"예상치 못한 오류가 발생했습니다: {str(e)}"}
 
-def generate_user_train_program(db: Session, thread_id: str, user_request: str="운동 프로그램을 추천해줘"):
-    try:
-        from assistant import client
-        thread = client.beta.threads.create()
-
-        user = db.query(User).join(AssistantThread).filter(AssistantThread.thread_id == thread_id).first()
-        record = (
-            db.query(BodyMeasurementRecord)
-            .filter(BodyMeasurementRecord.user_id == user.user_id)
-            .order_by(desc(BodyMeasurementRecord.recoded_at))
-            .first()
-        )
+## 설계 어시스턴트에 전달할 사용자 정보 ##
+def build_designer_metadata(user: User, record: BodyMeasurementRecord, thread_id: str) -> dict:
+    metadata = {"ID": str(thread_id), "운동목적": str(user.goals)}
+    profile = user.user_body_profile
+    if profile:
+        metadata.update({
+            "부상이력": str(profile.injuries),
+            "사용가능기구": str(profile.equipment),
+            "체지방률": str(profile.body_fat_percentage),
+            "골격근량": str(profile.body_muscle_mass),
+            "체중": str(profile.weight),
+            "신장": str(profile.height),
+            "나이": str(profile.user_age),
+        })
+    if record:
+        metadata.update({
+            "길이": str(
+                f"left_arm_length: {record.left_arm_length}, "
+                f"right_arm_length: {record.right_arm_length}, "
+                f"inside_leg_height: {record.inside_leg_height}, "
+                f"shoulder_to_crotch_height: {record.shoulder_to_crotch_height}"
+            ),
+            "둘레": str(
+                f"shoulder_breadth: {record.shoulder_breadth}, "
+                f"head_circumference: {record.head_circumference}, "
+                f"chest_circumference: {record.chest_circumference}, "
+                f"waist_circumference: {record.waist_circumference}, "
+                f"hip_circumference: {record.hip_circumference}, "
+                f"wrist_right_circumference: {record.wrist_right_circumference}, "
+                f"bicep_right_circumference: {record.bicep_right_circumference}, "
+                f"forearm_right_circumference: {record.forearm_right_circumference}, "
+                f"thigh_left_circumference: {record.thigh_left_circumference}, "
+                f"calf_left_circumference: {record.calf_left_circumference}, "
+                f"ankle_left_circumference: {record.ankle_left_circumference}"
+            ),
+        })
+    return metadata
+
+def design_training_program(db: Session, user_id: int, user_request: str, save: bool = True) -> dict:
+    """
+    설계 어시스턴트로 운동 프로그램을 생성하고 저장합니다.
+    실패 시 예외를 그대로 발생시킵니다.
 
+    :param db: 데이터베이스 세션
+    :param user_id: 사용자 ID
+    :param user_request: 설계 어시스턴트에 전달할 요청 문장
+    :param save: False이면 생성만 하고 DB에 저장하지 않습니다. (program_id는 None)
+    :return: {"program_id": 저장된 프로그램 ID, "program": 프로그램 데이터}
+    """
+    from assistant import get_client, thread_pool, ExerciseDesignerHandler, __EXERCISE_DESIGNER_INSTRUCTIONS__
+
+    user = db.query(User).filter(User.user_id == user_id).first()
+    if not user:
+        raise ValueError("사용자를 찾을 수 없습니다.")
+    record = (
+        db.query(BodyMeasurementRecord)
+        .filter(BodyMeasurementRecord.user_id == user.user_id)
+        .order_by(desc(BodyMeasurementRecord.recoded_at))
+        .first()
+    )
+
+    client = get_client()
+    thread_id = thread_pool.acquire_sync()
+    # 실행이 실패해도 원격 스레드가 남지 않도록 항상 삭제
+    try:
         response = client.beta.threads.messages.create(
-            thread_id=thread.id,
+            thread_id=thread_id,
             role="user",
             content=user_request,
-            metadata={"ID": str(thread.id), "운동목적": str(user.goals)}
+            metadata=build_designer_metadata(user, record, thread_id)
         )
 
-        from assistant import ExerciseDesignerHandler, __EXERCISE_DESIGNER_INSTRUCTIONS__
         with client.beta.threads.runs.stream(
-            thread_id=thread.id,
+            thread_id=thread_id,
             assistant_id=assistant_exercise_designer_id,
             instructions=__EXERCISE_DESIGNER_INSTRUCTIONS__,
-            event_handler=ExerciseDesignerHandler(db, thread.id),
+            event_handler=ExerciseDesignerHandler(db, thread_id),
         ) as stream:
             stream.until_done()
         stream.close()
@@ -248,67 +326,48 @@ def generate_user_train_program(db: Session, thread_id: str, user_request: str="
             raise RuntimeError("스트림에서 수신된 메시지가 없습니다.")
 
         program = json.loads(final_messages[0].content[0].text.value)
+        program_id = save_training_program(db, user.user_id, program) if save else None
+    finally:
+        try:
+            client.beta.threads.delete(thread_id)
+        except Exception as e:
+            print(f"[design_training_program] 스레드 삭제 실패 {thread_id}: {e!r}")
 
-        # print("Program generated:", program)  # 디버깅 추가
+    return {"program_id": program_id, "program": program}
 
-        new_program = TrainingProgram(
-            user_id=user.user_id,
-            training_cycle_length=program["training_cycle_length"],
-            constraints=json.dumps(program["constraints"], ensure_ascii=False),
-            notes=program["notes"]
-        )
-        db.add(new_program)
-        db.commit()
-        db.refresh(new_program)
+def _run_program_generation_job(user_id: int, user_request: str) -> dict:
+    db = SessionLocal()
+    try:
+        # 같은 요청으로 미리 생성되었고 입력이 바뀌지 않은 프로그램이 있으면 OpenAI 실행 없이 저장만 한다.
+        pending = speculative_programs.take(db, user_id, user_request)
+        if pending is not None:
+            return {"program_id": save_training_program(db, user_id, pending), "program": pending}
+        return design_training_program(db, user_id, user_request)
+    finally:
+        db.close()
+
+## 운동 프로그램 생성 작업 등록 ##
+# 같은 사용자가 같은 요청으로 생성 중이면 새 OpenAI 실행 없이 기존 작업을 반환한다.
+# 요청 문구가 다르면 다른 프로그램이 나와야 하므로 별도 작업으로 실행한다.
+def submit_program_generation(user_id: int, user_request: str = DEFAULT_PROGRAM_REQUEST) -> Tuple[Job, bool]:
+    return job_queue.submit(PROGRAM_GENERATION_JOB, user_id, _run_program_generation_job, user_id, user_request,
+                            dedup_key=normalize_request(user_request))
+
+def generate_user_train_program(db: Session, thread_id: str, user_request: str = DEFAULT_PROGRAM_REQUEST):
+    try:
+        user = db.query(User).join(AssistantThread).filter(AssistantThread.thread_id == thread_id).first()
+        if not user:
+            return {"status": "failed", "message": "사용자를 찾을 수 없습니다."}
 
-        # print("Program saved with ID:", new_program.id)  # 저장 확인 디버깅 추가
+        # 생성은 작업 큐에서 실행하고, 도구 응답을 위해 완료될 때까지 기다린다.
+        job, _ = submit_program_generation(user.user_id, user_request)
+        result = job.wait(timeout=PROGRAM_JOB_WAIT_TIMEOUT)
 
-        for cycle in program["cycles"]:
-            new_cycle = TrainingCycle(
-                program_id=new_program.id,
-                day_index=cycle["day_index"],
-                exercise_type=cycle["exercise_type"]
-            )
-            db.add(new_cycle)
-            db.commit()
-            db.refresh(new_cycle)
-
-            for ex_set in cycle["sets"]:
-                new_ex_set = ExerciseSet(
-                    program_id=new_program.id,
-                    cycle_id=new_cycle.id,
-                    focus_area=ex_set["focus_area"]
-                )
-                db.add(new_ex_set)
-                db.commit()
-                db.refresh(new_ex_set)
-
-                for detail in ex_set["exercises"]:
-                    new_detail = ExerciseDetail(
-                        set_id=new_ex_set.id,
-                        name=detail["name"],
-                        sets=detail["sets"],
-                        reps=detail["reps"],
-                        unit=detail["unit"],
-                        weight_type=detail.get("weight_type"),
-                        weight_value=detail.get("weight_value"),
-                        rest=detail["rest"]
-                    )
-                    db.add(new_detail)
-                    db.commit()
-                    db.refresh(new_detail)
-
-        # #디버깅 추가 저장된 DB 순회하여 확인
-        # for cycle in new_program.cycles:
-        #     print(f"Cycle ID: {cycle.id}, Day Index: {cycle.day_index}, Exercise Type: {cycle.exercise_type}")
-        #     for ex_set in cycle.exercise_sets:
-        #         print(f"  Set ID: {ex_set.id}, Focus Area: {ex_set.focus_area}")
-        #         for detail in ex_set.details:
-        #             print(f"    Detail ID: {detail.id}, Name: {detail.name}, Sets: {detail.sets}, Reps: {detail.reps}")
-
-        client.beta.threads.delete(thread.id)
-        
-        return {"status": "Message executed", "content": program}
+        return {"status": "Message executed", "content": result["program"]}
+
+    except FutureTimeoutError:
+        # 작업은 계속 진행되고, 완료되면 프로그램이 저장된다.
+        return {"status": "pending", "message": "운동 프로그램을 생성하는 중입니다. 잠시 후 다시 확인해주세요.", "job_id": job.job_id}
 
     except OpenAIError as e:
         return {"status": "failed", "message": f"OpenAI API 오류가 발생했습니다: {str(e)}"}
@@ -318,4 +377,4 @@ def generate_user_train_program(db: Session, thread_id: str, user_request: str="
         return {"status": "failed", "message": f"데이터베이스 오류가 발생했습니다: {str(e)}"}
     except Exception as e:
         db.rollback()
-        return {"status": "failed", "message": f"예상치 못한 오류가 발생했습니다: {str(e)}"}
\ No newline at end of file
+        return {"status": "failed", "message": f"예상치 못한 오류가 발생했습니다: {str(e)}"}
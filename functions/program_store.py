@@ -0,0 +1,84 @@
+import json
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from models import TrainingProgram, TrainingCycle, ExerciseSet, ExerciseDetail
+from .cache import invalidate_user_train_program
+
+def save_training_program(db: Session, user_id: int, program: dict) -> int:
+    """
+    설계 어시스턴트가 만든 운동 프로그램(JSON)을 하나의 트랜잭션으로 저장합니다.
+    계층(프로그램 > 사이클 > 세트 > 운동)마다 한 번의 다중 행 INSERT를 수행하며,
+    중간에 실패하면 전체를 롤백하여 일부만 저장된 프로그램이 남지 않습니다.
+
+    :param db: 데이터베이스 세션
+    :param user_id: 프로그램을 저장할 사용자 ID
+    :param program: training_cycle_length, constraints, notes, cycles를 가진 프로그램 데이터
+    :return: 저장된 TrainingProgram의 id
+    """
+    try:
+        new_program = TrainingProgram(
+            user_id=user_id,
+            training_cycle_length=program["training_cycle_length"],
+            constraints=json.dumps(program["constraints"], ensure_ascii=False),
+            notes=program["notes"]
+        )
+        db.add(new_program)
+        db.flush()
+        program_id = new_program.id
+
+        cycles = program["cycles"]
+        if cycles:
+            db.execute(insert(TrainingCycle), [
+                {
+                    "program_id": program_id,
+                    "day_index": cycle["day_index"],
+                    "exercise_type": cycle["exercise_type"]
+                }
+                for cycle in cycles
+            ])
+            # 새 프로그램의 행은 이 트랜잭션에서만 보이므로 id 순서가 곧 입력 순서다.
+            cycle_ids = db.execute(
+                select(TrainingCycle.id).where(TrainingCycle.program_id == program_id).order_by(TrainingCycle.id)
+            ).scalars().all()
+
+            set_rows = []
+            for cycle, cycle_id in zip(cycles, cycle_ids):
+                for ex_set in cycle["sets"]:
+                    set_rows.append(({
+                        "program_id": program_id,
+                        "cycle_id": cycle_id,
+                        "focus_area": ex_set["focus_area"]
+                    }, ex_set))
+
+            if set_rows:
+                db.execute(insert(ExerciseSet), [row for row, _ in set_rows])
+                set_ids = db.execute(
+                    select(ExerciseSet.id).where(ExerciseSet.program_id == program_id).order_by(ExerciseSet.id)
+                ).scalars().all()
+
+                detail_rows = [
+                    {
+                        "set_id": set_id,
+                        "name": detail["name"],
+                        "sets": detail["sets"],
+                        "reps": detail["reps"],
+                        "unit": detail["unit"],
+                        "weight_type": detail.get("weight_type"),
+                        "weight_value": detail.get("weight_value"),
+                        "rest": detail["rest"]
+                    }
+                    for (_, ex_set), set_id in zip(set_rows, set_ids)
+                    for detail in ex_set["exercises"]
+                ]
+                if detail_rows:
+                    db.execute(insert(ExerciseDetail), detail_rows)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    invalidate_user_train_program(user_id)
+    return program_id
@@ -0,0 +1,61 @@
+from typing import List, Optional
+
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from models import AssistantThread, AssistantMessage, BodyMeasurementRecord, TrainingProgram, TrainingCycle, ExerciseSet
+
+## 비동기 조회 함수 ##
+# async 라우트에서 이벤트 루프를 막지 않도록 AsyncSession으로 자주 쓰는 조회를 수행한다.
+# AsyncSession에서는 지연 로딩을 쓸 수 없으므로 필요한 관계는 미리 로드한다.
+
+## 사용자의 어시스턴트 쓰레드 조회 ##
+async def aget_thread_by_user(db: AsyncSession, user_id: int) -> Optional[AssistantThread]:
+    result = await db.execute(select(AssistantThread).where(AssistantThread.user_id == user_id).limit(1))
+    return result.scalars().first()
+
+## 사용자의 어시스턴트 쓰레드 목록 조회 ##
+async def aget_threads_by_user(db: AsyncSession, user_id: int) -> List[AssistantThread]:
+    result = await db.execute(select(AssistantThread).where(AssistantThread.user_id == user_id))
+    return list(result.scalars().all())
+
+## 쓰레드의 메세지 기록 조회 ##
+async def aget_messages_by_thread(db: AsyncSession, thread_id: str) -> List[AssistantMessage]:
+    result = await db.execute(select(AssistantMessage).where(AssistantMessage.thread_id == thread_id))
+    return list(result.scalars().all())
+
+## 쓰레드의 최신 메세지 조회 ##
+async def aget_latest_message(db: AsyncSession, thread_id: str) -> Optional[AssistantMessage]:
+    result = await db.execute(
+        select(AssistantMessage)
+        .where(AssistantMessage.thread_id == thread_id)
+        .order_by(desc(AssistantMessage.created_at))
+        .limit(1)
+    )
+    return result.scalars().first()
+
+## 최신 신체 측정 기록 조회 ##
+async def aget_latest_body_measurement(db: AsyncSession, user_id: int) -> Optional[BodyMeasurementRecord]:
+    result = await db.execute(
+        select(BodyMeasurementRecord)
+        .where(BodyMeasurementRecord.user_id == user_id)
+        .order_by(desc(BodyMeasurementRecord.recoded_at))
+        .limit(1)
+    )
+    return result.scalars().first()
+
+## 최신 운동 프로그램 조회 (사이클 > 세트 > 운동 포함) ##
+async def aget_latest_train_program(db: AsyncSession, user_id: int) -> Optional[TrainingProgram]:
+    result = await db.execute(
+        select(TrainingProgram)
+        .where(TrainingProgram.user_id == user_id)
+        .order_by(desc(TrainingProgram.created_at))
+        .limit(1)
+        .options(
+            selectinload(TrainingProgram.cycles)
+            .selectinload(TrainingCycle.exercise_sets)
+            .selectinload(ExerciseSet.details)
+        )
+    )
+    return result.scalars().first()
@@ -0,0 +1,186 @@
+import hashlib, json, os, threading, time
+
+from typing import Dict, Optional
+
+from sqlalchemy import desc
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from jobs import JobQueue
+from models import User, BodyMeasurementRecord
+
+# 신체 정보 변경 시 운동 프로그램을 미리 생성하는 모드 (기본 비활성)
+SPECULATIVE_PROGRAM_ENABLED = os.getenv("SPECULATIVE_PROGRAM_ENABLED", "0") == "1"
+# 마지막 변경 후 생성을 시작하기까지 기다리는 시간(초)
+SPECULATIVE_PROGRAM_DEBOUNCE = float(os.getenv("SPECULATIVE_PROGRAM_DEBOUNCE", "30"))
+# 미리 생성한 프로그램의 유효 시간(초)
+SPECULATIVE_PROGRAM_TTL = float(os.getenv("SPECULATIVE_PROGRAM_TTL", "86400"))
+# 사전 생성 전용 작업 워커 수 (사용자 생성 작업 큐와 분리해 사용자 작업을 밀어내지 않도록 함)
+SPECULATIVE_PROGRAM_WORKERS = int(os.getenv("SPECULATIVE_PROGRAM_WORKERS", "1"))
+# 사전 생성이 진행 중일 때 실제 요청이 합류해 기다리는 최대 시간(초)
+SPECULATIVE_PROGRAM_JOIN_TIMEOUT = float(os.getenv("SPECULATIVE_PROGRAM_JOIN_TIMEOUT", "90"))
+
+SPECULATIVE_PROGRAM_JOB = "train_program_speculative"
+# 운동 프로그램 생성 API와 도구의 기본 요청 문구 (사전 생성도 같은 문구로 해야 결과를 재사용할 수 있다)
+DEFAULT_PROGRAM_REQUEST = "주 4회, 회당 60분 정도의 운동 프로그램을 설계해줘"
+
+## 프로그램 입력 지문 ##
+# 목표, 신체 프로필, 최신 신체 측정 기록이 같으면 같은 지문을 갖는다.
+def program_input_fingerprint(db: Session, user_id: int) -> Optional[str]:
+    user = db.query(User).filter(User.user_id == user_id).first()
+    if not user:
+        return None
+    record = (
+        db.query(BodyMeasurementRecord.id)
+        .filter(BodyMeasurementRecord.user_id == user_id)
+        .order_by(desc(BodyMeasurementRecord.recoded_at))
+        .first()
+    )
+    profile = user.user_body_profile
+    payload = {
+        "goals": user.goals,
+        "record_id": record.id if record else None,
+        "profile": [
+            profile.user_age,
+            profile.gender.value if profile.gender else None,
+            profile.height,
+            profile.weight,
+            profile.body_fat_percentage,
+            profile.body_muscle_mass,
+            profile.injuries,
+            profile.equipment,
+        ] if profile else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def normalize_request(user_request: Optional[str]) -> str:
+    return " ".join((user_request or DEFAULT_PROGRAM_REQUEST).split())
+
+class PendingProgram:
+    def __init__(self, fingerprint: str, program: dict, request: str = DEFAULT_PROGRAM_REQUEST):
+        self.fingerprint = fingerprint
+        self.program = program
+        self.request = normalize_request(request)
+        self.created_at = time.monotonic()
+
+## 미리 생성한 운동 프로그램 저장소 ##
+# 신체 정보가 저장되면 사용자별로 디바운스한 뒤 설계 어시스턴트를 백그라운드로 실행하고,
+# 결과는 DB에 저장하지 않고 보류 프로그램으로 보관한다.
+# 실제 생성 요청 시 입력 지문이 같으면 보류 프로그램을 바로 사용한다.
+# 사전 생성은 전용 작업 큐(self.jobs)에서 실행되어 사용자 생성 작업의 워커를 차지하지 않는다.
+class SpeculativeProgramStore:
+    def __init__(self, enabled: bool = SPECULATIVE_PROGRAM_ENABLED, debounce: float = SPECULATIVE_PROGRAM_DEBOUNCE, ttl: float = SPECULATIVE_PROGRAM_TTL,
+                 workers: int = SPECULATIVE_PROGRAM_WORKERS, join_timeout: float = SPECULATIVE_PROGRAM_JOIN_TIMEOUT):
+        self.enabled = enabled
+        self.debounce = debounce
+        self.ttl = ttl
+        self.join_timeout = join_timeout
+        self.jobs = JobQueue(max_workers=workers, name="speculative-job")
+        self._timers: Dict[int, threading.Timer] = {}
+        self._pending: Dict[int, PendingProgram] = {}
+        self._lock = threading.Lock()
+        self.counters = {
+            "scheduled": 0,
+            "debounced": 0,
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "used": 0,
+            "joined": 0,
+            "request_mismatch": 0,
+            "stale": 0,
+            "expired": 0,
+        }
+
+    ## 신체 정보 변경 알림 ##
+    def schedule(self, user_id: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            timer = self._timers.pop(user_id, None)
+            if timer is not None:
+                timer.cancel()
+                self.counters["debounced"] += 1
+            timer = threading.Timer(self.debounce, self._start, args=(user_id,))
+            timer.daemon = True
+            self._timers[user_id] = timer
+            self.counters["scheduled"] += 1
+        timer.start()
+
+    def _start(self, user_id: int):
+        with self._lock:
+            self._timers.pop(user_id, None)
+            self.counters["started"] += 1
+        self.jobs.submit(SPECULATIVE_PROGRAM_JOB, user_id, self._generate, user_id)
+
+    def _generate(self, user_id: int):
+        from .functions import design_training_program
+
+        db = SessionLocal()
+        try:
+            fingerprint = program_input_fingerprint(db, user_id)
+            result = design_training_program(db, user_id, DEFAULT_PROGRAM_REQUEST, save=False)
+        except Exception:
+            with self._lock:
+                self.counters["failed"] += 1
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            self._pending[user_id] = PendingProgram(fingerprint, result["program"], DEFAULT_PROGRAM_REQUEST)
+            self.counters["completed"] += 1
+        return {"program_id": None, "program": result["program"]}
+
+    ## 보류 프로그램 꺼내기 ##
+    # 요청 문구가 미리 생성할 때 쓴 문구와 같고, 입력 지문이 그대로이며 유효 시간 안이면 프로그램을 반환한다.
+    # 한 번 꺼낸 프로그램은 제거되고, 요청 문구만 다르면 다음 기본 요청을 위해 남겨 둔다.
+    # 같은 문구의 사전 생성이 아직 실행 중이면 새로 실행하지 않고 join_timeout까지 기다린다.
+    def take(self, db: Session, user_id: int, user_request: Optional[str] = None) -> Optional[dict]:
+        if normalize_request(user_request) == normalize_request(DEFAULT_PROGRAM_REQUEST):
+            self._join(user_id)
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending is None:
+                return None
+            if pending.request != normalize_request(user_request):
+                self.counters["request_mismatch"] += 1
+                return None
+            del self._pending[user_id]
+        if time.monotonic() - pending.created_at > self.ttl:
+            with self._lock:
+                self.counters["expired"] += 1
+            return None
+        if pending.fingerprint != program_input_fingerprint(db, user_id):
+            with self._lock:
+                self.counters["stale"] += 1
+            return None
+        with self._lock:
+            self.counters["used"] += 1
+        return pending.program
+
+    def _join(self, user_id: int):
+        job = self.jobs.active_job(SPECULATIVE_PROGRAM_JOB, user_id)
+        if job is None:
+            return
+        with self._lock:
+            self.counters["joined"] += 1
+        try:
+            job.wait(timeout=self.join_timeout)
+        except Exception:
+            # 시간 초과나 실패 시에는 보류 프로그램 없이 새로 생성한다.
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self.counters["completed"]
+            stats = {
+                "enabled": self.enabled,
+                "pending": len(self._pending),
+                **self.counters,
+                "use_rate": round(self.counters["used"] / completed, 4) if completed else 0.0,
+            }
+        stats["jobs"] = self.jobs.stats()
+        return stats
+
+speculative_programs = SpeculativeProgramStore()
@@ -0,0 +1,68 @@
+# 운영용 gunicorn 설정 (scripts/start.sh production 모드에서 사용)
+#
+#   gunicorn -c gunicorn.conf.py main:app
+#
+# 환경 변수
+#   WEB_CONCURRENCY           워커 수 (기본: auto = 사용 가능한 CPU 코어 수, 숫자로 고정 가능)
+#   HOST, PORT                바인드 주소 (기본 0.0.0.0:8000)
+#   GUNICORN_TIMEOUT          응답 없는 워커를 재시작하기까지의 시간(초)
+#   GUNICORN_GRACEFUL_TIMEOUT 재시작/종료 시 처리 중인 요청을 기다리는 시간(초)
+#   GUNICORN_MAX_REQUESTS     워커가 이만큼 요청을 처리하면 재시작 (메모리 증가 방지, 0이면 사용하지 않음)
+#   FORWARDED_ALLOW_IPS       X-Forwarded-For / X-Forwarded-Proto를 믿을 프록시 IP (쉼표 구분, 기본 127.0.0.1)
+
+import os
+
+
+def available_cores() -> int:
+    # 컨테이너 CPU 제한(affinity)을 반영
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count(value: str) -> int:
+    if value.strip().lower() == "auto":
+        return available_cores()
+    return max(int(value), 1)
+
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+
+## 워커 수 ##
+# 기본은 CPU 코어당 워커 1개. 다만 아래 상태는 워커 프로세스 메모리에만 있어 워커끼리 공유되지 않는다.
+#   - 작업 큐(jobs): 작업 조회 API는 작업을 만든 워커로 간 요청에서만 결과를 찾고, 중복 생성 방지도 워커 안에서만 된다.
+#   - 운동 프로그램 사전 생성 결과, 도구 결과 캐시: 다른 워커의 요청에는 재사용되지 않는다.
+#   - 읽기 복제본의 최근 쓰기 기록: 쓰기 직후 다른 워커로 간 읽기는 복제 지연을 볼 수 있다.
+#   - 토큰 캐시 무효화, 폐기 토큰 재사용 감지: 다른 워커의 캐시는 TTL이 지나야 반영된다.
+#   - 로그인 시도 제한: LOGIN_LIMIT_BACKEND를 지정하지 않으면 한도가 워커 수만큼 늘어난다.
+# 이 차이를 허용할 수 없으면 WEB_CONCURRENCY=1로 고정한다.
+# 워커 수를 늘릴 때는 전체 DB 연결 수(database/pool.py)가 MySQL max_connections 안인지 확인할 것.
+workers = worker_count(os.getenv("WEB_CONCURRENCY", "auto"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# 리버스 프록시/로드밸런서 뒤에서는 여기 적힌 프록시가 보낸 X-Forwarded-For로 클라이언트 IP(request.client)를 정한다.
+# 로그인 시도 제한이 IP 단위이므로 반드시 실제 프록시 주소만 넣을 것. ("*"는 프록시만 접근 가능한 네트워크에서만)
+# dev 모드의 uvicorn도 같은 환경 변수(FORWARDED_ALLOW_IPS)를 읽는다.
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# 앱을 마스터에서 한 번 import 한 뒤 fork (워커 기동 시간, 메모리 절약)
+# DB 엔진, OpenAI 클라이언트는 처음 사용할 때 만들어지므로 마스터에서 연결이 생기지 않는다.
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", str(max_requests // 10)))
+
+accesslog = "-"
+errorlog = "-"
+
+
+# 혹시 마스터에서 만들어진 DB 연결이 있다면 워커가 공유하지 않도록 버린다.
+def post_fork(server, worker):
+    from database import reset_engines
+
+    reset_engines()
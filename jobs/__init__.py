@@ -0,0 +1,5 @@
+from .jobs import (
+    Job,
+    JobQueue,
+    job_queue,
+)
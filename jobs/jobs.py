@@ -0,0 +1,132 @@
+import os, threading, time, uuid
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# 작업 워커 수와 완료된 작업 보관 시간(초)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "3600"))
+
+## 작업 상태 ##
+# queued -> running -> succeeded | failed
+class Job:
+    def __init__(self, kind: str, user_id: int, dedup_key: Hashable = None):
+        self.job_id = str(uuid.uuid4())
+        self.kind = kind
+        self.user_id = user_id
+        self.dedup_key = dedup_key
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.joined = 0
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.future: Optional[Future] = None
+        self._finished_monotonic: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    ## 작업 완료 대기 ##
+    # 작업이 실패하면 원래 예외를 다시 발생시킨다.
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        return self.future.result(timeout=timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result if self.status == "succeeded" else None,
+            "error": self.error,
+            "joined": self.joined,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+## 로컬 작업 큐 ##
+# 같은 사용자의 같은 종류 작업이 진행 중이면 새로 만들지 않고 기존 작업에 합류한다.
+# dedup_key를 주면 그 값까지 같은 작업에만 합류한다. (예: 요청 문구가 다르면 별도 작업)
+class JobQueue:
+    def __init__(self, max_workers: int = JOB_WORKERS, result_ttl: float = JOB_RESULT_TTL, name: str = "job-worker"):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.result_ttl = result_ttl
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[Tuple[str, int, Hashable], str] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def submit(self, kind: str, user_id: int, fn: Callable[..., Any], *args: Any, dedup_key: Hashable = None) -> Tuple[Job, bool]:
+        key = (kind, user_id, dedup_key)
+        with self._lock:
+            self._purge_expired()
+            active_id = self._active.get(key)
+            if active_id is not None:
+                job = self._jobs[active_id]
+                job.joined += 1
+                self.deduplicated += 1
+                return job, False
+
+            job = Job(kind, user_id, dedup_key)
+            self._jobs[job.job_id] = job
+            self._active[key] = job.job_id
+            self.submitted += 1
+            job.future = self.executor.submit(self._run, job, fn, args)
+            return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active_job(self, kind: str, user_id: int, dedup_key: Hashable = None) -> Optional[Job]:
+        with self._lock:
+            job_id = self._active.get((kind, user_id, dedup_key))
+            return self._jobs.get(job_id) if job_id else None
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple) -> Any:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        try:
+            result = fn(*args)
+            job.result = result
+            job.status = "succeeded"
+            return result
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            raise
+        finally:
+            job.finished_at = datetime.utcnow()
+            job._finished_monotonic = time.monotonic()
+            with self._lock:
+                key = (job.kind, job.user_id, job.dedup_key)
+                if self._active.get(key) == job.job_id:
+                    del self._active[key]
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job._finished_monotonic is not None and now - job._finished_monotonic > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses: Dict[str, int] = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+            return {
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "active": len(self._active),
+                "statuses": statuses,
+            }
+
+job_queue = JobQueue()
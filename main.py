@@ -7,18 +7,18 @@
 # - 메모리 구성을 하겠다면, 어떻게 파인튜닝할것인지?
 
 
-import nest_asyncio
-nest_asyncio.apply()
-
 import sqlite3
 from routes.auth import auth_router
 from routes.assistant import assistant_router
 from routes.mesh_recovery import recovery_router
+from routes.metrics import metrics_router
+from routes.health import health_router
 from schemas import schemas
 from models import models
-from database import database, Base, engine
+from database import database, Base, get_engine, get_async_engine, warm_up_pool, awarm_up_pool, QueryStatsMiddleware
 from routes import auth
-from utils import token, password_utils, SQLInjectionProtectedRoute
+from utils import token, password_utils, SQLInjectionProtectedRoute, loop_monitor, LoopMonitorMiddleware, password_hasher
+from assistant import thread_pool
 
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
@@ -27,6 +27,7 @@ from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from base64 import b64encode
 
 # FastAPI 애플리케이션 생성
@@ -57,21 +58,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 요청별 SQL 쿼리 수 / DB 시간 집계 및 N+1 경고
+app.add_middleware(QueryStatsMiddleware)
+
+# 이벤트 루프 지연 감시 (LOOP_MONITOR_ENABLED=1 일 때 막힌 코드의 스택과 라우트 기록)
+app.add_middleware(LoopMonitorMiddleware)
 
 # HTTPS 리다이렉트
 # app.add_middleware(HTTPSRedirectMiddleware)
 
-# 레이트 리미팅 설정
+# 레이트 리미팅 설정 (로그인 시도 제한은 utils/login_limiter.py)
 # limiter = Limiter(key_func=get_remote_address, default_limits=["100/minute"])
 # app.state.limiter = limiter
 
 # # DB 연결
-# Base.metadata.create_all(bind=engine)
+# Base.metadata.create_all(bind=get_engine())
+
+# OpenAI 쓰레드 풀 채우기 시작
+@app.on_event("startup")
+def start_thread_pool():
+    thread_pool.start()
+
+# 종료 시 쓰지 않은 OpenAI 쓰레드 삭제 (gunicorn 워커 재시작/종료 포함)
+@app.on_event("shutdown")
+async def drain_thread_pool():
+    await thread_pool.drain()
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    loop_monitor.start()
+
+# bcrypt cost 보정 (PASSWORD_BCRYPT_ROUNDS 미지정 시)
+@app.on_event("startup")
+async def calibrate_password_hasher():
+    await run_in_threadpool(password_hasher.calibrate)
+
+# DB 커넥션 풀 예열 (DB_POOL_WARMUP 개)
+@app.on_event("startup")
+async def warm_up_db_pools():
+    # 엔진 생성(드라이버 import)도 이벤트 루프를 막지 않도록 스레드에서 수행
+    await run_in_threadpool(lambda: warm_up_pool(get_engine()))
+    await awarm_up_pool(get_async_engine())
 
 app.include_router(auth_router, prefix="/auth",tags=["authentications"])
 app.include_router(recovery_router, prefix="/recovery",tags=["BodyShapeEstimations"])
 # app.include_router(user.router, prefix="/users", tags=["Users"])
 app.include_router(assistant_router, prefix="/assistant", tags=["Assistant"])
+app.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
+app.include_router(health_router, prefix="/health", tags=["Health"])
 # app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 # app.include_router(reminders.router, prefix="/reminder", tags=["Reminder"])
 
@@ -0,0 +1,153 @@
+"""baseline schema
+
+인덱스 추가(0001) 이전의 테이블을 그대로 만듭니다. 빈 DB는 `alembic upgrade head`로 전체 스키마를 만들고,
+예전에 Base.metadata.create_all로 만든 DB는 테이블이 이미 있으므로 `alembic stamp 0000` 후 `alembic upgrade head`를 실행합니다.
+이후 스키마(인덱스 포함)는 이 디렉터리의 리비전에서만 변경합니다.
+
+Revision ID: 0000
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0000"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("user_id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("user_uuid", sa.CHAR(36), nullable=False),
+        sa.Column("user_name", sa.String(100), nullable=False),
+        sa.Column("user_password", sa.String(255), nullable=False),
+        sa.Column("phone_number", sa.String(15), nullable=False),
+        sa.Column("email", sa.String(100), nullable=False),
+        sa.Column("goals", sa.String(1000), nullable=True),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("last_login", sa.DateTime, nullable=False),
+        sa.UniqueConstraint("user_uuid", name="user_uuid"),
+    )
+    op.create_table(
+        "user_body_profile",
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.user_id"), primary_key=True),
+        sa.Column("user_age", sa.Integer, nullable=True),
+        sa.Column("gender", sa.Enum("male", "female", name="genderenum"), nullable=True),
+        sa.Column("height", sa.Float, nullable=True),
+        sa.Column("weight", sa.Float, nullable=True),
+        sa.Column("body_fat_percentage", sa.Float, nullable=True),
+        sa.Column("body_muscle_mass", sa.Float, nullable=True),
+        sa.Column("injuries", sa.Text, nullable=True),
+        sa.Column("equipment", sa.Text, nullable=True),
+    )
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("token", sa.String(255), nullable=False),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.user_id"), nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+        sa.Column("last_used_at", sa.DateTime, nullable=False),
+        sa.UniqueConstraint("token", name="token"),
+    )
+    op.create_table(
+        "assistant_threads",
+        sa.Column("thread_id", sa.CHAR(36), primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.user_id"), nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("run_state", sa.String(50), nullable=False),
+        sa.Column("run_id", sa.String(100), nullable=False),
+    )
+    op.create_table(
+        "assistant_messages",
+        sa.Column("message_id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("thread_id", sa.CHAR(36), sa.ForeignKey("assistant_threads.thread_id"), nullable=False),
+        sa.Column("sender_type", sa.Enum("user", "assistant"), nullable=False),
+        sa.Column("content", sa.String(500), nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+    )
+    op.create_table(
+        "body_measurements_record",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.user_id"), nullable=False),
+        sa.Column("recoded_at", sa.DateTime, nullable=False),
+        *[
+            sa.Column(name, sa.Float, nullable=False)
+            for name in (
+                "height",
+                "left_arm_length",
+                "right_arm_length",
+                "inside_leg_height",
+                "shoulder_to_crotch_height",
+                "shoulder_breadth",
+                "head_circumference",
+                "chest_circumference",
+                "waist_circumference",
+                "hip_circumference",
+                "wrist_right_circumference",
+                "bicep_right_circumference",
+                "forearm_right_circumference",
+                "thigh_left_circumference",
+                "calf_left_circumference",
+                "ankle_left_circumference",
+            )
+        ],
+    )
+    op.create_table(
+        "training_programs",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.user_id"), nullable=False),
+        sa.Column("training_cycle_length", sa.Integer, nullable=False),
+        sa.Column("constraints", sa.String(500), nullable=False),
+        sa.Column("notes", sa.String(1000), nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+    )
+    op.create_table(
+        "training_cycles",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("program_id", sa.Integer, sa.ForeignKey("training_programs.id"), nullable=False),
+        sa.Column("day_index", sa.Integer, nullable=False),
+        sa.Column("exercise_type", sa.Integer, nullable=False),
+    )
+    op.create_table(
+        "exercise_sets",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("program_id", sa.Integer, sa.ForeignKey("training_programs.id"), nullable=False),
+        sa.Column("cycle_id", sa.Integer, sa.ForeignKey("training_cycles.id"), nullable=False),
+        sa.Column("focus_area", sa.String(255), nullable=False),
+    )
+    op.create_table(
+        "exercise_details",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("set_id", sa.Integer, sa.ForeignKey("exercise_sets.id"), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("sets", sa.Integer, nullable=False),
+        sa.Column("reps", sa.Integer, nullable=False),
+        sa.Column("unit", sa.String(50), nullable=False),
+        sa.Column("weight_type", sa.String(50), nullable=True),
+        sa.Column("weight_value", sa.Float, nullable=True),
+        sa.Column("rest", sa.Integer, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    for table in (
+        "exercise_details",
+        "exercise_sets",
+        "training_cycles",
+        "training_programs",
+        "body_measurements_record",
+        "assistant_messages",
+        "assistant_threads",
+        "refresh_tokens",
+        "user_body_profile",
+        "users",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,54 @@
+"""add indexes for hot lookup paths
+
+자주 조회되는 필터/정렬 컬럼에 인덱스를 추가합니다.
+- assistant_messages(thread_id, created_at): 쓰레드 메세지 기록, 최신 메세지
+- body_measurements_record(user_id, recoded_at): 최신 신체 측정 기록
+- training_programs(user_id, created_at): 최신 운동 프로그램
+- refresh_tokens(user_id), assistant_threads(user_id): 사용자별 조회
+- users(email), users(phone_number): 로그인, 회원가입 중복 확인
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = "0000"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_assistant_messages_thread_id_created_at", "assistant_messages", ["thread_id", "created_at"])
+    op.create_index("ix_body_measurements_record_user_id_recoded_at", "body_measurements_record", ["user_id", "recoded_at"])
+    op.create_index("ix_training_programs_user_id_created_at", "training_programs", ["user_id", "created_at"])
+    op.create_index("ix_refresh_tokens_user_id", "refresh_tokens", ["user_id"])
+    op.create_index("ix_assistant_threads_user_id", "assistant_threads", ["user_id"])
+    op.create_index("ix_users_email", "users", ["email"])
+    op.create_index("ix_users_phone_number", "users", ["phone_number"])
+
+
+# 새 인덱스가 외래 키를 대신하던 (테이블, 인덱스, 외래 키 컬럼)
+FK_BACKED_INDEXES = (
+    ("assistant_messages", "ix_assistant_messages_thread_id_created_at", "thread_id"),
+    ("body_measurements_record", "ix_body_measurements_record_user_id_recoded_at", "user_id"),
+    ("training_programs", "ix_training_programs_user_id_created_at", "user_id"),
+    ("refresh_tokens", "ix_refresh_tokens_user_id", "user_id"),
+    ("assistant_threads", "ix_assistant_threads_user_id", "user_id"),
+)
+
+
+def downgrade() -> None:
+    # InnoDB는 새 인덱스가 외래 키를 대신할 수 있게 되면 외래 키용 자동 인덱스를 지우고, DROP INDEX 때 다시 만들어 주지 않는다.
+    # 외래 키가 쓰는 인덱스는 지울 수 없으므로(오류 1553), 자동 인덱스와 같은 이름(컬럼명)의 일반 인덱스를 먼저 만든 뒤 제거합니다.
+    for table, index, column in FK_BACKED_INDEXES:
+        op.create_index(column, table, [column])
+        op.drop_index(index, table_name=table)
+    op.drop_index("ix_users_phone_number", table_name="users")
+    op.drop_index("ix_users_email", table_name="users")
@@ -0,0 +1,38 @@
+"""store refresh tokens as sha256 hashes
+
+refresh_tokens.token(VARCHAR(255), 원문)을 token_hash(CHAR(64), sha256 hex, 고유 인덱스)로 바꿉니다.
+기존 토큰은 SHA2()로 해시해 옮기므로 발급된 리프레시 토큰은 그대로 사용할 수 있습니다.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("refresh_tokens", sa.Column("token_hash", sa.CHAR(64), nullable=True))
+    op.execute("UPDATE refresh_tokens SET token_hash = SHA2(token, 256)")
+    op.alter_column("refresh_tokens", "token_hash", existing_type=sa.CHAR(64), nullable=False)
+    op.create_index("ix_refresh_tokens_token_hash", "refresh_tokens", ["token_hash"], unique=True)
+    # token 컬럼의 고유 인덱스도 함께 제거됨
+    op.drop_column("refresh_tokens", "token")
+
+
+def downgrade() -> None:
+    # 해시에서 원문을 되돌릴 수 없으므로 리프레시 토큰을 모두 삭제합니다. (사용자는 다시 로그인해야 함)
+    op.execute("DELETE FROM refresh_tokens")
+    op.add_column("refresh_tokens", sa.Column("token", sa.String(255), nullable=False))
+    op.create_unique_constraint("token", "refresh_tokens", ["token"])
+    op.drop_index("ix_refresh_tokens_token_hash", table_name="refresh_tokens")
+    op.drop_column("refresh_tokens", "token_hash")
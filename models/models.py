@@ -8,6 +8,7 @@ from database import Base
 from typing import List, Union
 import datetime, enum
 
+# 스키마 변경과 인덱스는 migrations/versions의 리비전에서만 정의한다. (모델에는 인덱스를 선언하지 않음)
 class User(Base):
     __tablename__ = "users"
     user_id : Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -51,7 +52,8 @@ class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    token: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
+    # 토큰 원문 대신 sha256 hex만 저장 (AuthHandler.hash_token)
+    token_hash: Mapped[str] = mapped_column(CHAR(64), nullable=False, unique=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.user_id"), nullable=False)
     created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=func.now())
     expires_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
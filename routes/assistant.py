@@ -1,17 +1,20 @@
 import json, os
-import traceback
 
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy import desc
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from openai import OpenAIError
 
 from models import  AssistantMessageCreate, AssistantThread, AssistantMessage, User, TrainingProgram, TrainingCycle, ExerciseDetail, ExerciseSet, BodyMeasurementRecord
-from database import get_db
-from assistant import client, AssistantHandler, ExerciseDesignerHandler, __INSTRUCTIONS__, __EXERCISE_DESIGNER_INSTRUCTIONS__
-from utils import get_current_user
+from database import get_db, get_async_db, get_async_read_db
+from assistant import stream_assistant_run, SSE_HEADERS, run_state_registry, thread_pool, delete_thread, create_message, run_assistant
+from utils import get_current_principal, Principal
+from functions import submit_program_generation, DEFAULT_PROGRAM_REQUEST, aget_thread_by_user, aget_threads_by_user, aget_messages_by_thread, aget_latest_message, aget_latest_train_program
+from jobs import job_queue
 
 assistant_router = APIRouter()
 
@@ -30,40 +33,40 @@ assistant_exercise_designer_id = os.getenv("ASSISTANT_EXERCISE_DESIGNER_ID") # 
 #        o888o     o888o o888o d888b    `Y8bod8P' `Y888""8o `Y8bod88P"
 # run state : creating, created, run, interrupt, done
 
-# 스레드 생성
-async def create_assistant_thread(user_id: int, db: Session = Depends(get_db)):
-    thread = client.beta.threads.create()
+# 스레드 생성 (미리 만들어 둔 쓰레드 풀에서 꺼내 사용)
+async def create_assistant_thread(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    thread_id = await thread_pool.acquire()
     
     assistant_thread = AssistantThread(
         user_id=user_id,
-        thread_id=thread.id
+        thread_id=thread_id
     )
     
     db.add(assistant_thread)
-    db.commit()
-    db.refresh(assistant_thread)
+    await db.commit()
+    await db.refresh(assistant_thread)
     
     return assistant_thread
     
 
 # 특정 사용자의 스레드 조회
 @assistant_router.get("/threads")
-async def get_threads_by_user(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    threads = db.query(AssistantThread).filter(AssistantThread.user_id == user.user_id).all()
+async def get_threads_by_user(user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_read_db)):
+    threads = await aget_threads_by_user(db, user.user_id)
     if not threads:
         threads = await create_assistant_thread(user.user_id, db)
 
     return threads
 # 스레드 삭제
 @assistant_router.delete("/threads")
-async def delete_assistant_thread(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def delete_assistant_thread(user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
     thread = db.query(AssistantThread).filter(AssistantThread.user_id == user.user_id).first()
     if not thread:
         raise HTTPException(status_code=404, detail="쓰레드를 찾을 수 없습니다.")
 
     # OpenAI Thread 삭제 시도
     try:
-        client.beta.threads.delete(thread.thread_id)
+        await delete_thread(thread.thread_id)
     except OpenAIError as e:
         # 404 오류인 경우 무시하고 DB만 삭제
         if "No thread found with id" in str(e):
@@ -73,6 +76,7 @@ async def delete_assistant_thread(user: User = Depends(get_current_user), db: Se
             raise HTTPException(status_code=500, detail="쓰레드 삭제 중 오류가 발생했습니다." + str(e) + str(thread.thread_id))
 
     # DB 기록 삭제
+    run_state_registry.discard(thread.thread_id)
     db.delete(thread)
     db.commit()
     return {"message": "쓰레드를 삭제했습니다."}
@@ -86,25 +90,22 @@ async def delete_assistant_thread(user: User = Depends(get_current_user), db: Se
 #                                                           d"     YD           
 #                                                           "Y88888P'           
 
+# Accept: text/event-stream 요청 시 응답을 SSE로 스트리밍
+# event: run_state | tool_call | delta | message_done | error | done
 @assistant_router.post("/message")
-async def add_and_run_message(message: AssistantMessageCreate, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    thread = db.query(AssistantThread).filter(AssistantThread.user_id == user.user_id).first()
+async def add_and_run_message(message: AssistantMessageCreate, request: Request, user: Principal = Depends(get_current_principal), db: Session = Depends(get_db), adb: AsyncSession = Depends(get_async_db)):
+    thread = await aget_thread_by_user(adb, user.user_id)
     if not thread:
-        thread = await create_assistant_thread(user.user_id, db)
+        thread = await create_assistant_thread(user.user_id, adb)
+
+    # 진행 중 상태는 메모리 저장소에 있고, DB에는 마지막 종료 상태만 남아있다.
+    run_state = run_state_registry.get(thread.thread_id) or thread.run_state
     try:
-        if thread.run_state != "None" or thread.run_state in ["thread.run.completed", "thread.run.cancelled"]:
-            response = client.beta.threads.messages.create(
-                thread_id=thread.thread_id,
-                role="user",
-                content=message.content
-            )
-        elif thread.run_state in ["thread.run.failed"]:
-            delete_assistant_thread(user, db)
-            response = client.beta.threads.messages.create(
-                thread_id=thread.thread_id,
-                role="user",
-                content=message.content
-            )
+        if run_state != "None" or run_state in ["thread.run.completed", "thread.run.cancelled"]:
+            response = await create_message(thread.thread_id, message.content)
+        elif run_state in ["thread.run.failed"]:
+            await delete_assistant_thread(user, db)
+            response = await create_message(thread.thread_id, message.content)
         else:
             return {"status": "Message created but not executed", "content": "죄송합니다. 잠시 후 다시 시도해주세요."}
 
@@ -119,180 +120,78 @@ async def add_and_run_message(message: AssistantMessageCreate, user: User = Depe
         content=message.content,
         created_at=datetime.utcnow()
     )
-    db.add(new_message)
-    db.commit()
-    db.refresh(new_message)
+    adb.add(new_message)
+    await adb.commit()
+
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            stream_assistant_run(thread.thread_id, assistant_id, user.user_id),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
 
-    with client.beta.threads.runs.stream(
-        thread_id=thread.thread_id,
-        assistant_id=assistant_id,
-        instructions=__INSTRUCTIONS__,
-        event_handler=AssistantHandler(db, thread.thread_id),
-    ) as stream:
-        stream.until_done()
-    latest_message = db.query(AssistantMessage).filter(AssistantMessage.thread_id == thread.thread_id).order_by(desc(AssistantMessage.created_at)).first()
+    # 응답 기록은 핸들러가 동기 세션으로 스레드풀에서 수행한다.
+    await run_assistant(db, thread.thread_id, assistant_id)
+    latest_message = await aget_latest_message(adb, thread.thread_id)
 
     return {"status": "Message created and executed", "content": latest_message.content}
 
 @assistant_router.get("/messages")
-async def get_messages_by_thread(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    thread = db.query(AssistantThread).filter(AssistantThread.user_id == user.user_id).first()
+async def get_messages_by_thread(user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_read_db)):
+    thread = await aget_thread_by_user(db, user.user_id)
     if not thread:
         raise HTTPException(status_code=404, detail="쓰레드를 찾을 수 없습니다.")
 
-    messages = db.query(AssistantMessage).filter(AssistantMessage.thread_id == thread.thread_id).all()
+    messages = await aget_messages_by_thread(db, thread.thread_id)
     if not messages:
         return []
     
     return messages
 
 @assistant_router.get("/messages/latest")
-async def get_latest_message(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    thread = db.query(AssistantThread).filter(AssistantThread.user_id == user.user_id).first()
+async def get_latest_message(user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_read_db)):
+    thread = await aget_thread_by_user(db, user.user_id)
     if not thread:
         thread = await create_assistant_thread(user.user_id, db)
 
-    latest_message = db.query(AssistantMessage).filter(AssistantMessage.thread_id == thread.thread_id).order_by(desc(AssistantMessage.created_at)).first()
+    latest_message = await aget_latest_message(db, thread.thread_id)
     if not latest_message:
         raise HTTPException(status_code=404, detail="최신 메세지를 찾을 수 없습니다.")
     
     return latest_message
 
-# # Test용
-@assistant_router.post("/temp_message_run")
-async def temp_message_run(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    try:
-        # 임시 쓰레드 생성
-        thread = client.beta.threads.create()
-        thread_id = db.query(AssistantThread).filter(AssistantThread.user_id == user.user_id).first().thread_id
-        
-        record = db.query(BodyMeasurementRecord).filter(BodyMeasurementRecord.user_id == user.user_id).order_by(desc(BodyMeasurementRecord.recoded_at)).first()
-        # 메시지 실행
-        response = client.beta.threads.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content=f"주 4회, 회당 60분 정도의 운동 프로그램을 설계해줘",
-            metadata={
-                "ID": str(thread_id),
-                "운동목적": str(user.goals),
-                "부상이력": str(user.user_body_profile.injuries),
-                "사용가능기구": str(user.user_body_profile.equipment),
-                "체지방률": str(user.user_body_profile.body_fat_percentage),
-                "골격근량": str(user.user_body_profile.body_muscle_mass),
-                "체중": str(user.user_body_profile.weight),
-                "신장": str(user.user_body_profile.height),
-                "나이": str(user.user_body_profile.user_age),
-                "길이": str(
-                    f"left_arm_length: {record.left_arm_length}, "
-                    f"right_arm_length: {record.right_arm_length}, "
-                    f"inside_leg_height: {record.inside_leg_height}, "
-                    f"shoulder_to_crotch_height: {record.shoulder_to_crotch_height}"
-                ),
-                "둘레": str(
-                    f"shoulder_breadth: {record.shoulder_breadth}, "
-                    f"head_circumference: {record.head_circumference}, "
-                    f"chest_circumference: {record.chest_circumference}, "
-                    f"waist_circumference: {record.waist_circumference}, "
-                    f"hip_circumference: {record.hip_circumference}, "
-                    f"wrist_right_circumference: {record.wrist_right_circumference}, "
-                    f"bicep_right_circumference: {record.bicep_right_circumference}, "
-                    f"forearm_right_circumference: {record.forearm_right_circumference}, "
-                    f"thigh_left_circumference: {record.thigh_left_circumference}, "
-                    f"calf_left_circumference: {record.calf_left_circumference}, "
-                    f"ankle_left_circumference: {record.ankle_left_circumference}"
-                )
-            }
-        )
-
-        # 메시지 실행 결과를 스트림으로 처리
-        with client.beta.threads.runs.stream(
-            thread_id=thread.id,
-            assistant_id=assistant_exercise_designer_id,
-            instructions=__EXERCISE_DESIGNER_INSTRUCTIONS__,
-            event_handler=ExerciseDesignerHandler(db, thread.id),
-        ) as stream:
-            stream.until_done()
-        stream.close()
-        final_messages = stream.get_final_messages()
-
-        if not final_messages:
-            # 적절한 에러 처리 또는 사용자 안내
-            raise RuntimeError("스트림에서 수신된 메시지가 없습니다.")
-        
-        program = json.loads(stream.get_final_messages()[0].content[0].text.value)
+### 운동 프로그램 생성 작업 API ###
+# 운동 프로그램 생성은 작업 큐에서 실행하고, 요청에는 작업 ID만 즉시 반환한다.
+# 같은 사용자의 생성 작업이 진행 중이면 기존 작업에 합류한다.
 
-        new_program = TrainingProgram(
-            user_id=user.user_id,
-            training_cycle_length=program["training_cycle_length"],
-            constraints=json.dumps(program["constraints"], ensure_ascii=False),
-            notes=program["notes"]
-        )
-        db.add(new_program)
-        db.commit()
-        db.refresh(new_program)
-
-        for cycle in program["cycles"]:
-            new_cycle = TrainingCycle(
-                program_id=new_program.id,
-                day_index=cycle["day_index"],
-                exercise_type=cycle["exercise_type"]
-            )
-            db.add(new_cycle)
-            db.commit()
-            db.refresh(new_cycle)
+@assistant_router.post("/train_program/jobs", status_code=202)
+async def create_train_program_job(user_request: str = DEFAULT_PROGRAM_REQUEST, user: Principal = Depends(get_current_principal)):
+    job, created = submit_program_generation(user.user_id, user_request)
+    return {"job_id": job.job_id, "status": job.status, "deduplicated": not created}
 
-            for ex_set in cycle["sets"]:
-                new_ex_set = ExerciseSet(
-                    program_id=new_program.id,
-                    cycle_id=new_cycle.id,
-                    focus_area=ex_set["focus_area"]
-                )
-                db.add(new_ex_set)
-                db.commit()
-                db.refresh(new_ex_set)
+@assistant_router.get("/train_program/jobs/{job_id}")
+async def get_train_program_job(job_id: str, user: Principal = Depends(get_current_principal)):
+    job = job_queue.get(job_id)
+    if not job or job.user_id != user.user_id:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job.to_dict()
 
-                for detail in ex_set["exercises"]:
-                    new_detail = ExerciseDetail(
-                        set_id=new_ex_set.id,
-                        name=detail["name"],
-                        sets=detail["sets"],
-                        reps=detail["reps"],
-                        unit=detail["unit"],
-                        weight_type=detail.get("weight_type"),
-                        weight_value=detail.get("weight_value"),
-                        rest=detail["rest"]
-                    )
-                    db.add(new_detail)
-                    db.commit()
-                    db.refresh(new_detail)
-        client.beta.threads.delete(thread_id)
-        return {
-            "status": "Message executed",
-            "content": json.dumps(json.loads(stream.get_final_messages()[0].content[0].text.value), indent=2, ensure_ascii=False)
-        }
+# # Test용
+@assistant_router.post("/temp_message_run", status_code=202)
+async def temp_message_run(user: Principal = Depends(get_current_principal)):
+    job, created = submit_program_generation(user.user_id, DEFAULT_PROGRAM_REQUEST)
+    return {"status": "Job submitted", "job_id": job.job_id, "deduplicated": not created}
 
-    except SQLAlchemyError as e:
-        db.rollback()
-        return {"status": "failed", "message": f"데이터베이스 오류가 발생했습니다: {str(e)}"}
-    except OpenAIError as e:
-        return {"status": "failed", "message": f"OpenAI API 오류가 발생했습니다: {str(e)}"}
-    except Exception as e:
-        return {
-            "status": "failed", 
-            "message": f"예상치 못한 오류가 발생했습니다.",
-            "error": str(e),
-            "traceback": traceback.format_exc()
-            }
 # get user train program to json
 @assistant_router.get("/user_train_program")
 async def get_complete_user_train_program(
-    user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    user: Principal = Depends(get_current_principal), 
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     try:
         # Fetch the user's training program
         # 가장 마지막에 저장된 것 조회
-        program = db.query(TrainingProgram).filter(TrainingProgram.user_id == user.user_id).order_by(desc(TrainingProgram.created_at)).first()
+        program = await aget_latest_train_program(db, user.user_id)
         if not program:
             raise HTTPException(status_code=404, detail="사용자의 훈련 프로그램을 찾을 수 없습니다.")
 
@@ -332,7 +231,7 @@ async def get_complete_user_train_program(
         return program_data
 
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"데이터베이스 오류가 발생했습니다: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"예상치 못한 오류가 발생했습니다: {str(e)}")
\ No newline at end of file
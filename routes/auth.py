@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Header
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
@@ -7,8 +7,8 @@ from sqlalchemy.exc import SQLAlchemyError
 from database import get_db
 from schemas import UserCreate, UserUpdate, UserResponse, TokenResponse, UserRegister, Login
 from datetime import timedelta, datetime
-from utils import auth_handler, get_password_hash, verify_password, get_current_user
-from models import User, RefreshToken
+from utils import auth_handler, password_hasher, login_limiter, get_current_user, db_pool, token_cache
+from models import User
 
 import uuid, re, os
 
@@ -20,31 +20,38 @@ auth_router = APIRouter()
 ######################################## 사용자 생성 ########################################
 ############################################################################################
 @auth_router.post('/user_register', response_model=UserRegister) # 출력 하는 모델
-def user_register(user: UserCreate, db: Session = Depends(get_db)): # 입력 받는 모델
-    try:
-        # 이메일 입력 검증
-        if user.email:
-            existing_user = db.query(User).filter(User.email == user.email).first()
-            if existing_user:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, 
-                    detail="이미 등록된 이메일입니다")
-        
-        # 전화번호 입력 검증
-        if user.phone_number:
-            existing_user = db.query(User).filter(User.phone_number == user.phone_number).first()
-            if existing_user:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, 
-                    detail="전화번호가 이미 등록되어 있습니다")
-        
-        if not user.email and not user.phone_number:
+async def user_register(user: UserCreate, db: Session = Depends(get_db)): # 입력 받는 모델
+    # DB 작업은 DB 풀에서, 비밀번호 해싱(bcrypt)은 해싱 서비스에서 실행
+    await db_pool.run(validate_new_user, user, db)
+    hashed_password = await password_hasher.hash(user.user_password)
+    return await db_pool.run(create_user, user, hashed_password, db)
+
+## 가입 정보 검증 ##
+def validate_new_user(user: UserCreate, db: Session):
+    # 이메일 입력 검증
+    if user.email:
+        existing_user = db.query(User).filter(User.email == user.email).first()
+        if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, 
-                detail="이메일 혹은 전화번호를 입력해주세요")
-
-        hashed_password = get_password_hash(user.user_password)
+                detail="이미 등록된 이메일입니다")
+    
+    # 전화번호 입력 검증
+    if user.phone_number:
+        existing_user = db.query(User).filter(User.phone_number == user.phone_number).first()
+        if existing_user:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, 
+                detail="전화번호가 이미 등록되어 있습니다")
+    
+    if not user.email and not user.phone_number:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, 
+            detail="이메일 혹은 전화번호를 입력해주세요")
 
+## 사용자 저장 및 토큰 발급 ##
+def create_user(user: UserCreate, hashed_password: str, db: Session) -> UserRegister:
+    try:
         # 새 사용자 생성
         new_user = User(
             user_uuid=str(uuid.uuid4()),
@@ -92,29 +99,48 @@ def user_register(user: UserCreate, db: Session = Depends(get_db)): # 입력 받
 ############################################################################################
 
 @auth_router.post("/login", response_model=TokenResponse)
-def login(data: Login, db: Session = Depends(get_db)):
-    user = None
-    identifier = data.identifier
+async def login(data: Login, request: Request, db: Session = Depends(get_db)):
+    # 잠긴 식별자/IP는 DB 조회와 bcrypt 검증 전에 429로 거절
+    # request.client는 FORWARDED_ALLOW_IPS에 있는 프록시가 보낸 X-Forwarded-For만 반영한다. (gunicorn.conf.py)
+    # 그 외 클라이언트가 보낸 X-Forwarded-For는 무시되므로 IP를 바꿔가며 제한을 피할 수 없다.
+    identifier = data.identifier["value"]
+    client_ip = request.client.host if request.client else "unknown"
+    await login_limiter.check(identifier, client_ip)
+
+    user = await db_pool.run(find_login_user, data.identifier, db)
+    if not user:
+        await login_limiter.record_failure(identifier, client_ip)
+        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
+
+    # 비밀번호 검증(bcrypt)은 해싱 서비스에서 실행 (과부하 시 503)
+    if not await password_hasher.verify(data.password, user.user_password):
+        await login_limiter.record_failure(identifier, client_ip)
+        raise HTTPException(status_code=401, detail="비밀번호가 일치하지 않습니다")
+    await login_limiter.record_success(identifier, client_ip)
+
+    # 현재 cost보다 낮은 해시는 로그인에 성공한 김에 다시 해싱해 저장
+    if password_hasher.needs_upgrade(user.user_password):
+        user.user_password = await password_hasher.upgrade(data.password)
+
+    return await db_pool.run(issue_login_tokens, user, db)
 
+## 로그인 사용자 조회 ##
+def find_login_user(identifier: dict, db: Session) -> User:
+    user = None
     if identifier["type"] == "email":            # 이메일로 로그인 시
         user = db.query(User).filter(User.email == identifier["value"]).first()
     elif identifier["type"] == "phone_number":   # 전화번호로 로그인 시
         user = db.query(User).filter(User.phone_number == identifier["value"]).first()
+    return user
 
-    if not user:
-        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
-    
-
-    if not verify_password(data.password,  user.user_password):
-        raise HTTPException(status_code=401, detail="비밀번호가 일치하지 않습니다")
-
-    # 기존 리프레시 토큰 무효화
-    existing_refresh_token = db.query(RefreshToken).filter(RefreshToken.user_id == user.user_id).first()
-    if existing_refresh_token:
-        return TokenResponse(access_token=auth_handler.create_access_token(user.user_id),
-                            refresh_token=existing_refresh_token.token)
+## 로그인 토큰 발급 ##
+def issue_login_tokens(user: User, db: Session) -> TokenResponse:
+    # 비밀번호 해시가 갱신되었으면 저장
+    if user in db.dirty:
+        db.commit()
 
     # 새로운 액세스 토큰 및 리프레시 토큰 발급
+    # DB에는 토큰 해시만 있으므로 기존 리프레시 토큰을 돌려줄 수 없어 로그인마다 새로 발급한다.
     access_token = auth_handler.create_access_token(user.user_id)
     refresh_token = auth_handler.create_refresh_token(user.user_id)
 
@@ -136,22 +162,17 @@ def refresh(access_token: str = Header(None), refresh_token: str = Header(None),
     user_id = access_payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="토큰이 유효하지 않습니다")
+    user_id = int(user_id)
 
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
+    new_access_token =auth_handler.create_access_token(user_id)
+    new_refresh_token = auth_handler.create_refresh_token(user_id)
 
-    valid_refresh_token = auth_handler.get_refreshtoken(db, refresh_token)
-    
-    if valid_refresh_token.user_id != user.user_id:
+    # 기존 토큰이 이 사용자의 유효한 토큰일 때만 한 트랜잭션에서 새 토큰으로 교체
+    if not auth_handler.rotate_refresh_token(db, user_id, refresh_token, new_refresh_token):
         raise HTTPException(status_code=401, detail="토큰이 유효하지 않습니다")
 
-    new_access_token =auth_handler.create_access_token(user.user_id)
-    new_refresh_token = auth_handler.create_refresh_token(user.user_id)
-
-    auth_handler.delete_token(db, refresh_token)
-    
-    auth_handler.save_token(db, user.user_id, new_refresh_token)
+    # 재발급 전 토큰으로 검증된 캐시 제거
+    token_cache.invalidate_user(user_id)
     return {"access_token": new_access_token, "refresh_token": new_refresh_token}
 
 ############################################################################################
@@ -160,12 +181,10 @@ def refresh(access_token: str = Header(None), refresh_token: str = Header(None),
 
 @auth_router.post("/logout")
 def logout(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    refresh_token = db.query(RefreshToken).filter(RefreshToken.user_id == user.user_id).first()
-    
-    if not refresh_token:
+    # 사용자의 리프레시 토큰 모두 폐기
+    if not auth_handler.delete_user_tokens(db, user.user_id):
         raise HTTPException(status_code=404, detail="리프레시 토큰을 찾을 수 없습니다")
-    
-    auth_handler.delete_token(db, refresh_token.token)
+    token_cache.invalidate_user(user.user_id)
 
     return JSONResponse(content={"message": "로그아웃 되었습니다"})
 
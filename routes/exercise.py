@@ -4,11 +4,9 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from dotenv import load_dotenv
 from models import User, UserBodyProfile
 from utils import get_current_user
 from database import get_db
-load_dotenv()
 
 
 exercise_router = APIRouter()
@@ -0,0 +1,53 @@
+import asyncio, os
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from database import get_async_engine
+from assistant import get_async_client
+from utils import ml_address
+
+health_router = APIRouter()
+
+# 준비 상태 확인 시 의존 서비스별 제한 시간(초)
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+
+
+async def check_database():
+    async with get_async_engine().connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+# API 호출 없이 클라이언트 생성과 키 설정만 확인한다.
+async def check_openai():
+    if not get_async_client().api_key:
+        raise RuntimeError("OPENAI_API_KEY가 설정되지 않았습니다.")
+
+async def check_ml_server():
+    ml_host, ml_port = ml_address()
+    if not ml_host or not ml_port:
+        raise RuntimeError("ML_HOST, ML_PORT가 설정되지 않았습니다.")
+    _, writer = await asyncio.open_connection(ml_host, int(ml_port))
+    writer.close()
+    await writer.wait_closed()
+
+
+# 프로세스가 살아있는지만 확인 (의존 서비스는 확인하지 않음)
+@health_router.get("/live")
+async def liveness():
+    return {"status": "ok"}
+
+# DB, OpenAI, ML 서버를 동시에 확인하고 하나라도 실패하면 503
+@health_router.get("/ready")
+async def readiness():
+    checks = {"database": check_database, "openai": check_openai, "ml_server": check_ml_server}
+    results = await asyncio.gather(
+        *(asyncio.wait_for(check(), timeout=HEALTH_CHECK_TIMEOUT) for check in checks.values()),
+        return_exceptions=True,
+    )
+    status = {
+        name: "ok" if not isinstance(result, BaseException) else f"error: {type(result).__name__} {result}".strip()
+        for name, result in zip(checks, results)
+    }
+    ready = all(value == "ok" for value in status.values())
+    return JSONResponse(status_code=200 if ready else 503, content={"status": "ready" if ready else "not_ready", "checks": status})
@@ -3,21 +3,16 @@ from fastapi.responses import JSONResponse
 
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, joinedload
-import requests
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 
 from datetime import datetime, timedelta
 
-from dotenv import load_dotenv
 from models import User, BodyMeasurementRecord, AssistantThread, TrainingProgram, UserBodyProfile
 from schemas import BodyMeasurementRecordSchema
-from utils import get_current_user
-from database import get_db
-load_dotenv()
-
-ml_host = os.getenv("ML_HOST")
-ml_port = os.getenv("ML_PORT")
-
+from utils import get_current_user, get_current_principal, Principal, request_process_image, run_in_pool, io_pool, db_pool
+from database import get_db, get_async_db, get_read_db, get_async_read_db
+from functions import speculative_programs, aget_latest_body_measurement
 recovery_router = APIRouter()
 
 def calculate_mean_std(records, field, actual_height):
@@ -42,7 +37,8 @@ from functions import estimate_body_fat_percentage, estimate_appendicular_skelet
 
 # 1번~12번 유저 체지방률, 사지근골격량 추출 및 파일로 저장
 @recovery_router.get('/BFandASMestimation')
-def body_fat_and_asm_estimation(db: Session = Depends(get_db)):
+@run_in_pool(db_pool)
+def body_fat_and_asm_estimation(db: Session = Depends(get_read_db)):
     try:
         user_stats = []
         for user_id in range(1, 13):
@@ -86,7 +82,8 @@ def body_fat_and_asm_estimation(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"예상치 못한 오류가 발생했습니다: {str(e)}")
 
 @recovery_router.get('/body_measurement_record/batch_statistics')
-def batch_body_measurement_statistics(db: Session = Depends(get_db)):
+@run_in_pool(db_pool)
+def batch_body_measurement_statistics(db: Session = Depends(get_read_db)):
     try:
         user_stats = []
         overall_sums = {}
@@ -243,6 +240,7 @@ def update_user_body_profile(
         # 변경 사항 저장
         db.commit()
         db.refresh(user_body_profile)
+        speculative_programs.schedule(user.user_id)
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -270,14 +268,11 @@ def update_user_body_profile(
 
 
 @recovery_router.post("/process-image/")
-async def process_image(file: UploadFile = File(...), _fov: int = 60, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def process_image(file: UploadFile = File(...), _fov: int = 60, user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)):
     try:
         user_id = user.user_id
-        url = f"http://{ml_host}:{ml_port}/process-image/?_fov={_fov}"
-        files = {'file': (file.filename, file.file, file.content_type)}
-        headers = {'accept': 'application/json'}
-
-        response = requests.post(url, headers=headers, files=files)
+        # ML 서버 호출은 이벤트 루프를 막지 않도록 외부 I/O 풀에서 실행
+        response = await io_pool.run(request_process_image, file, _fov)
 
         # if response.status_code != 200:
         #     raise HTTPException(status_code=response.status_code, detail="이미지 처리 중 오류가 발생했습니다")
@@ -306,8 +301,9 @@ async def process_image(file: UploadFile = File(...), _fov: int = 60, user: User
             ankle_left_circumference=record['ankle left circumference']
         )
         db.add(new_record)
-        db.commit()
-        db.refresh(new_record)
+        await db.commit()
+        await db.refresh(new_record)
+        speculative_programs.schedule(user_id)
 
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
@@ -337,14 +333,14 @@ async def process_image(file: UploadFile = File(...), _fov: int = 60, user: User
         )
     # 데이터베이스 관련 오류 처리
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"데이터베이스 오류가 발생했습니다: {str(e)}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"예상치 못한 오류가 발생했습니다: {str(e)}")
 # 개인 신체기록 전체 삭제
 @recovery_router.delete('/body_measurement_record', status_code=status.HTTP_204_NO_CONTENT)
-def delete_body_measurement_record(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def delete_body_measurement_record(user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
     try:
         # 사용자 존재 여부 확인
         if not user:
@@ -375,7 +371,7 @@ def delete_body_measurement_record(user: User = Depends(get_current_user), db: S
 
 # get
 @recovery_router.get('/body_measurement_record', response_model=BodyMeasurementRecordSchema)
-def get_body_measurement_record(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_body_measurement_record(user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_read_db)):
     try:
         # 사용자 존재 여부 확인
         if not user:
@@ -384,7 +380,7 @@ def get_body_measurement_record(user: User = Depends(get_current_user), db: Sess
         # 최근 신체 측정 기록 조회
         # record = db.query(BodyMeasurementRecord).filter(BodyMeasurementRecord.user_id == user.user_id).first()
         # 가장 마지막 측정 기록 조회
-        record = db.query(BodyMeasurementRecord).filter(BodyMeasurementRecord.user_id == user.user_id).order_by(BodyMeasurementRecord.recoded_at.desc()).first()
+        record = await aget_latest_body_measurement(db, user.user_id)
         if not record:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="신체 측정 기록을 찾을 수 없습니다.")
         
@@ -416,8 +412,8 @@ def get_body_measurement_record(user: User = Depends(get_current_user), db: Sess
         }
     )
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"데이터베이스 오류가 발생했습니다: {str(e)}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"예상치 못한 오류가 발생했습니다: {str(e)}")
\ No newline at end of file
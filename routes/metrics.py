@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends
+
+from functions import train_program_cache, speculative_programs
+from jobs import job_queue
+from assistant import thread_pool, write_behind_stats
+from utils import require_admin, loop_monitor, WORKLOAD_POOLS, auth_handler, token_cache, password_hasher, login_limiter
+from database import get_engine, get_async_engine, get_read_engine, get_async_read_engine, pool_status, recent_writes, slow_query_log
+
+# 쿼리 원문, 실행 계획 등이 노출되므로 모든 지표 API는 관리자 토큰(X-Admin-Token: ADMIN_API_TOKEN)이 필요하다.
+metrics_router = APIRouter(dependencies=[Depends(require_admin)])
+
+# 도구 결과 캐시 통계
+@metrics_router.get("/cache")
+def get_cache_metrics():
+    return {
+        "train_program": train_program_cache.stats(),
+        "auth_token": token_cache.stats(),
+    }
+
+# 작업 큐 통계
+@metrics_router.get("/jobs")
+def get_job_metrics():
+    return job_queue.stats()
+
+# 운동 프로그램 사전 생성 통계
+@metrics_router.get("/speculative_programs")
+def get_speculative_program_metrics():
+    return speculative_programs.stats()
+
+# OpenAI 쓰레드 풀 통계
+@metrics_router.get("/thread_pool")
+def get_thread_pool_metrics():
+    return thread_pool.stats()
+
+# 어시스턴트 응답 write-behind 통계 (델타 수, DB 쓰기 수, 절약한 쓰기 수)
+@metrics_router.get("/assistant_writes")
+def get_assistant_write_metrics():
+    return write_behind_stats.stats()
+
+# DB 커넥션 풀 통계 (사용 중 / 유휴 / 오버플로우 연결 수, 연결 대기 시간)
+@metrics_router.get("/db_pool")
+def get_db_pool_metrics():
+    return {
+        "sync": pool_status(get_engine()),
+        "async": pool_status(get_async_engine()),
+        "read_sync": pool_status(get_read_engine()),
+        "read_async": pool_status(get_async_read_engine()),
+    }
+
+# 읽기 복제본 라우팅 통계
+@metrics_router.get("/db_replica")
+def get_db_replica_metrics():
+    return recent_writes.stats()
+
+# 느린 쿼리 기록 (파라미터는 가려서 저장, EXPLAIN 결과는 비동기로 채워짐)
+@metrics_router.get("/slow_queries")
+def get_slow_queries(limit: int = 50):
+    return {
+        **slow_query_log.stats(),
+        "entries": slow_query_log.entries(limit),
+    }
+
+@metrics_router.delete("/slow_queries")
+def clear_slow_queries():
+    slow_query_log.clear()
+    return {"message": "느린 쿼리 기록을 비웠습니다."}
+
+# 이벤트 루프 지연 히스토그램과 최근 막힘 기록 (LOOP_MONITOR_ENABLED=1)
+@metrics_router.get("/event_loop")
+def get_event_loop_metrics():
+    return loop_monitor.stats()
+
+# 작업 종류별 스레드 풀 통계 (대기열 길이, 대기 시간)
+@metrics_router.get("/executors")
+def get_executor_metrics():
+    return {name: pool.stats() for name, pool in WORKLOAD_POOLS.items()}
+
+# 비밀번호 해싱 서비스 (bcrypt cost, 대기/거절 수, 해시·검증 소요 시간)
+@metrics_router.get("/password_hasher")
+def get_password_hasher_metrics():
+    return password_hasher.stats()
+
+# 로그인 시도 제한 (실패/거절/잠금 횟수)
+@metrics_router.get("/login_limiter")
+def get_login_limiter_metrics():
+    return login_limiter.stats()
+
+# 리프레시 토큰 재발급 / 폐기 토큰 재사용 감지 횟수
+@metrics_router.get("/refresh_tokens")
+def get_refresh_token_metrics():
+    return auth_handler.rotated_tokens.stats()
@@ -0,0 +1,19 @@
+#!/bin/sh
+# 서버 실행 스크립트 (벤치마크는 이 스크립트로 서버를 띄운다)
+#
+#   APP_MODE=production sh scripts/start.sh   # gunicorn (기본, 워커 수는 WEB_CONCURRENCY)
+#   APP_MODE=dev sh scripts/start.sh          # uvicorn 단일 프로세스, 코드 변경 시 재시작
+#
+# HOST, PORT, WEB_CONCURRENCY 등은 gunicorn.conf.py 참고
+set -e
+
+cd "$(dirname "$0")/.."
+
+HOST="${HOST:-0.0.0.0}"
+PORT="${PORT:-8000}"
+
+if [ "${APP_MODE:-production}" = "dev" ]; then
+    exec uvicorn main:app --host "$HOST" --port "$PORT" --reload
+fi
+
+exec gunicorn -c gunicorn.conf.py main:app
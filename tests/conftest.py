@@ -0,0 +1,23 @@
+# 테스트 공통 설정
+# 앱 모듈은 import 시점에 환경 변수를 읽으므로, 없으면 임의의 값을 넣어 둔다. (DB, OpenAI에는 연결하지 않음)
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TEST_ENV = {
+    "SECRET_KEY": "test-secret",
+    "algorithm": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "OPENAI_API_KEY": "sk-test",
+    "DB_USER": "user",
+    "DB_PASSWORD": "password",
+    "DB_HOST": "127.0.0.1",
+    "DB_PORT": "3306",
+    "DB_NAME": "db",
+}
+
+for name, value in TEST_ENV.items():
+    if not os.getenv(name):
+        os.environ[name] = value
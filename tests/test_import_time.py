@@ -0,0 +1,9 @@
+# 워커 콜드 스타트: 새 프로세스에서 `import main` 시간이 예산(IMPORT_TIME_BUDGET) 안인지 확인
+# import 시점에는 DB, OpenAI, ML 서버에 연결하지 않으므로 임의의 접속 정보(conftest.py)로 실행한다.
+from benchmarks.bench_import_time import IMPORT_TIME_BUDGET, measure_once
+
+
+def test_import_main_within_budget():
+    # 호스트 부하에 따른 흔들림을 줄이기 위해 여러 번 재서 최솟값으로 비교 (벤치마크 스크립트와 같은 방식)
+    best = min(measure_once() for _ in range(5))
+    assert best <= IMPORT_TIME_BUDGET, f"import main {best:.3f}s > budget {IMPORT_TIME_BUDGET:.3f}s"
@@ -0,0 +1,40 @@
+# 운동 프로그램 생성 도구: 작업이 도구 대기 시간 안에 끝나지 않으면 작업 ID가 담긴 pending 응답을 돌려주는지 확인
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import User, AssistantThread
+import functions.functions as functions
+
+
+def test_inner_wait_is_shorter_than_tool_deadline():
+    assert functions.PROGRAM_JOB_WAIT_TIMEOUT < functions.ASSISTANT_TOOL_TIMEOUT
+
+
+def test_slow_program_job_returns_pending(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__, AssistantThread.__table__])
+    db = sessionmaker(engine)()
+    db.add(User(user_id=1, user_uuid="uuid", user_name="user", phone_number="01000000000", email="user@example.com", user_password="x"))
+    db.add(AssistantThread(thread_id="thread", user_id=1, run_state="None", run_id="None"))
+    db.commit()
+
+    release = threading.Event()
+
+    def slow_generation(user_id, user_request):
+        release.wait(5)
+        return {"program_id": None, "program": {}}
+
+    monkeypatch.setattr(functions, "_run_program_generation_job", slow_generation)
+    monkeypatch.setattr(functions, "PROGRAM_JOB_WAIT_TIMEOUT", 0.05)
+    try:
+        result = functions.generate_user_train_program(db, "thread", "pending test request")
+    finally:
+        release.set()
+        db.close()
+
+    assert result["status"] == "pending"
+    job = functions.job_queue.get(result["job_id"])
+    assert job is not None and job.user_id == 1
@@ -0,0 +1,25 @@
+# 읽기 복제본 라우팅: 요청 정보 없이 만든 세션(SSE 스트림 등)의 쓰기도 사용자 단위로 기록되는지 확인
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import database.replica as replica
+from database import Base
+from models import AssistantMessage
+
+
+def test_stream_session_write_marks_user(monkeypatch):
+    monkeypatch.setattr(replica, "DB_READ_HOST", "replica")
+    monkeypatch.setattr(replica, "recent_writes", replica.RecentWrites(window=60))
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[AssistantMessage.__table__])
+
+    # 어시스턴트 메세지에는 user_id가 없으므로 세션에 지정된 사용자로 기록해야 한다.
+    db = sessionmaker(engine)(info={"user_id": 7, "thread_id": "thread"})
+    db.add(AssistantMessage(thread_id="thread", sender_type="assistant", content="안녕하세요", created_at=datetime.utcnow()))
+    db.commit()
+    db.close()
+
+    assert replica.recent_writes.is_recent(("user", 7))
+    assert replica.recent_writes.is_recent(("thread", "thread"))
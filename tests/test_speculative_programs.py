@@ -0,0 +1,57 @@
+# 운동 프로그램 사전 생성: 기본 요청 문구로 만든 결과를 실제 생성 요청이 재사용하는지 확인
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import functions.functions as functions
+import functions.speculative as speculative
+from database import Base
+from models import User
+from functions import DEFAULT_PROGRAM_REQUEST, SpeculativeProgramStore
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(engine)()
+    db.add(User(user_id=1, user_uuid="uuid", user_name="user", phone_number="01000000000", email="user@example.com", user_password="x"))
+    db.commit()
+    return db
+
+
+def test_speculative_program_is_reused_for_default_request(monkeypatch):
+    db = make_session()
+    monkeypatch.setattr(speculative, "SessionLocal", lambda: make_session())
+    lanes = []
+
+    def fake_design(db, user_id, user_request, save=True):
+        lanes.append((threading.current_thread().name, user_request))
+        return {"program_id": None, "program": {"training_cycle_length": 4}}
+
+    monkeypatch.setattr(functions, "design_training_program", fake_design)
+    store = SpeculativeProgramStore(enabled=True, debounce=0)
+    try:
+        store._start(1)
+        # 사전 생성이 끝나지 않았어도 take()가 실행 중인 작업에 합류해 결과를 받는다.
+        program = store.take(db, 1, DEFAULT_PROGRAM_REQUEST)
+    finally:
+        db.close()
+
+    assert program == {"training_cycle_length": 4}
+    # 사용자 작업 큐(job-worker)가 아닌 사전 생성 전용 큐에서 기본 요청 문구로 한 번만 실행된다.
+    assert len(lanes) == 1
+    assert lanes[0][0].startswith("speculative-job")
+    assert lanes[0][1] == DEFAULT_PROGRAM_REQUEST
+    assert store.stats()["used"] == 1
+
+
+def test_speculative_program_is_kept_for_other_requests():
+    db = make_session()
+    store = SpeculativeProgramStore(enabled=True, debounce=0)
+    store._pending[1] = speculative.PendingProgram(speculative.program_input_fingerprint(db, 1), {"training_cycle_length": 4})
+    try:
+        assert store.take(db, 1, "주 3회 운동 프로그램") is None
+        assert store.take(db, 1) == {"training_cycle_length": 4}
+    finally:
+        db.close()
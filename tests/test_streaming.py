@@ -0,0 +1,60 @@
+# SSE 스트리밍: 실행은 run_assistant 한 곳을 거치고, 핸들러 이벤트가 순서대로 전달되는지 확인
+import asyncio
+
+import assistant.streaming as streaming
+
+
+class FakeSession:
+    def __init__(self, info=None):
+        self.info = dict(info or {})
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def collect(agen):
+    async def run():
+        return [chunk async for chunk in agen]
+    return asyncio.run(run())
+
+
+def test_stream_assistant_run_forwards_events(monkeypatch):
+    sessions = []
+    calls = []
+
+    def session_factory(**kwargs):
+        sessions.append(FakeSession(**kwargs))
+        return sessions[-1]
+
+    async def fake_run_assistant(db, thread_id, assistant_id, event_sink=None):
+        calls.append((thread_id, assistant_id))
+        event_sink("delta", {"text": "안녕"})
+        event_sink("message_done", {"text": "안녕하세요"})
+
+    monkeypatch.setattr(streaming, "SessionLocal", session_factory)
+    monkeypatch.setattr(streaming, "run_assistant", fake_run_assistant)
+
+    chunks = collect(streaming.stream_assistant_run("thread", "assistant", 7))
+
+    assert calls == [("thread", "assistant")]
+    assert chunks == [
+        streaming.format_sse("delta", {"text": "안녕"}),
+        streaming.format_sse("message_done", {"text": "안녕하세요"}),
+        streaming.format_sse("done", {}),
+    ]
+    assert sessions[0].closed
+    # 응답을 기록하는 세션에도 사용자/쓰레드가 지정되어 read-your-writes 대상이 된다.
+    assert sessions[0].info == {"user_id": 7, "thread_id": "thread"}
+
+
+def test_stream_assistant_run_reports_errors(monkeypatch):
+    async def failing_run_assistant(db, thread_id, assistant_id, event_sink=None):
+        raise RuntimeError("run failed")
+
+    monkeypatch.setattr(streaming, "SessionLocal", FakeSession)
+    monkeypatch.setattr(streaming, "run_assistant", failing_run_assistant)
+
+    chunks = collect(streaming.stream_assistant_run("thread", "assistant"))
+
+    assert chunks == [streaming.format_sse("error", {"message": "run failed"}), streaming.format_sse("done", {})]
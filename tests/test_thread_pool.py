@@ -0,0 +1,30 @@
+# OpenAI 쓰레드 풀: 종료 시 꺼내지 않은 쓰레드를 삭제하고 더 이상 채우지 않는지 확인
+import asyncio
+
+import assistant.runner as runner
+from assistant import AssistantThreadPool
+
+
+def test_drain_deletes_unused_threads(monkeypatch):
+    deleted = []
+
+    async def fake_delete_thread(thread_id):
+        if thread_id == "broken":
+            raise RuntimeError("delete failed")
+        deleted.append(thread_id)
+
+    monkeypatch.setattr(runner, "delete_thread", fake_delete_thread)
+    pool = AssistantThreadPool(size=3)
+    pool._threads.extend(["thread-1", "thread-2", "broken"])
+
+    assert asyncio.run(pool.drain()) == 2
+
+    assert deleted == ["thread-1", "thread-2"]
+    stats = pool.stats()
+    assert stats["available"] == 0
+    assert stats["drained"] == 2
+    assert stats["errors"] == 1
+    # 비운 뒤에는 꺼내거나 다시 채우지 않는다.
+    assert pool.take() is None
+    pool.start()
+    assert pool._worker is None
@@ -1,15 +1,51 @@
 from .password_utils import(
     get_password_hash, 
-    verify_password
+    verify_password,
+    password_hasher,
+    PasswordHasher
 )
 
 from .token import(
     auth_handler,
-    get_current_user
+    get_current_user,
+    get_current_principal,
+    Principal,
+    require_admin
+)
+
+from .token_cache import(
+    token_cache,
+    VerifiedTokenCache
+)
+
+from .login_limiter import(
+    login_limiter,
+    LoginLimiter,
+    LocalLoginLimitBackend
 )
 
 from .protector import(
     SQLInjectionProtectedRoute,
     sql_injection_protection,
     is_valid_injection
-)
\ No newline at end of file
+)
+
+from .ml_client import(
+    get_ml_session,
+    request_process_image,
+    ml_address
+)
+
+from .loop_monitor import(
+    loop_monitor,
+    LoopMonitorMiddleware
+)
+
+from .executors import(
+    cpu_pool,
+    io_pool,
+    db_pool,
+    password_pool,
+    WORKLOAD_POOLS,
+    run_in_pool
+)
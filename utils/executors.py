@@ -0,0 +1,90 @@
+import asyncio, contextvars, os, threading, time
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+## 작업 종류별 스레드 풀 ##
+# 기본 스레드풀 하나를 모두가 나눠 쓰면 로그인(bcrypt)이 몰릴 때 다른 요청이 밀리므로,
+# CPU 연산 / 외부 I/O(ML 서버, OpenAI) / DB 작업을 각각 크기가 정해진 풀에서 실행한다.
+CPU_POOL_SIZE = int(os.getenv("CPU_POOL_SIZE", str(os.cpu_count() or 1)))
+EXTERNAL_IO_POOL_SIZE = int(os.getenv("EXTERNAL_IO_POOL_SIZE", "16"))
+DB_WORK_POOL_SIZE = int(os.getenv("DB_WORK_POOL_SIZE", "10"))
+# 비밀번호 해싱(bcrypt) 전용. 로그인이 몰려도 나머지 CPU 작업은 cpu 풀에서 계속 처리된다.
+PASSWORD_HASH_POOL_SIZE = int(os.getenv("PASSWORD_HASH_POOL_SIZE", str(max(1, (os.cpu_count() or 1) // 2))))
+
+
+class WorkloadExecutor:
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def _run_timed(self, submitted_at: float, func, *args, **kwargs):
+        started_at = time.perf_counter()
+        wait = started_at - submitted_at
+        with self._lock:
+            self.started += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.completed += 1
+                self.total_run += time.perf_counter() - started_at
+
+    ## 동기 함수를 이 풀에서 실행하고 결과를 기다린다 ##
+    # 요청 컨텍스트(쿼리 통계 등)가 이어지도록 contextvars를 복사해 실행한다.
+    async def run(self, func, *args, **kwargs):
+        with self._lock:
+            self.submitted += 1
+        context = contextvars.copy_context()
+        call = partial(context.run, self._run_timed, time.perf_counter(), func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "active": self.started - self.completed,
+                "queued": self.submitted - self.started,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": round(self.total_wait / self.started * 1000, 3) if self.started else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "avg_run_ms": round(self.total_run / self.completed * 1000, 3) if self.completed else 0.0,
+            }
+
+cpu_pool = WorkloadExecutor("cpu", CPU_POOL_SIZE)
+io_pool = WorkloadExecutor("external-io", EXTERNAL_IO_POOL_SIZE)
+db_pool = WorkloadExecutor("db", DB_WORK_POOL_SIZE)
+password_pool = WorkloadExecutor("password", PASSWORD_HASH_POOL_SIZE)
+
+WORKLOAD_POOLS = {pool.name: pool for pool in (cpu_pool, io_pool, db_pool, password_pool)}
+
+
+## 라우트 실행 풀 지정 ##
+# 동기 라우트 함수를 기본 스레드풀 대신 지정한 풀에서 실행한다. (의존성은 기존대로 해석됨)
+#
+#   @auth_router.post("/login")
+#   @run_in_pool(cpu_pool)
+#   def login(...): ...
+def run_in_pool(pool: WorkloadExecutor):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await pool.run(func, *args, **kwargs)
+        return wrapper
+    return decorator
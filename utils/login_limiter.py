@@ -0,0 +1,135 @@
+import importlib, os, threading, time
+
+from collections import OrderedDict, deque
+from typing import Optional, Tuple
+from fastapi import HTTPException
+
+## 로그인 시도 제한 설정 ##
+# 윈도우(초) 안의 실패 횟수가 한도에 닿으면 잠그고, 잠길 때마다 잠금 시간이 2배로 늘어난다.
+LOGIN_LIMIT_WINDOW = float(os.getenv("LOGIN_LIMIT_WINDOW", "300"))
+LOGIN_LIMIT_IDENTIFIER_FAILURES = int(os.getenv("LOGIN_LIMIT_IDENTIFIER_FAILURES", "5"))
+LOGIN_LIMIT_IP_FAILURES = int(os.getenv("LOGIN_LIMIT_IP_FAILURES", "20"))
+LOGIN_LOCKOUT_BASE = float(os.getenv("LOGIN_LOCKOUT_BASE", "30"))
+LOGIN_LOCKOUT_MAX = float(os.getenv("LOGIN_LOCKOUT_MAX", "3600"))
+# 잠금이 풀린 뒤 이 시간(초) 동안 실패가 없으면 잠금 단계를 초기화
+LOGIN_LOCKOUT_RESET = float(os.getenv("LOGIN_LOCKOUT_RESET", "86400"))
+# 워커 간 상태 공유용 저장소 ("모듈:클래스", 비우면 워커별 메모리 저장소)
+LOGIN_LIMIT_BACKEND = os.getenv("LOGIN_LIMIT_BACKEND", "")
+LOGIN_LIMIT_MAX_KEYS = int(os.getenv("LOGIN_LIMIT_MAX_KEYS", "100000"))
+
+
+## 시도 기록 저장소 ##
+# 워커 간에 공유하려면 같은 메서드를 가진 클래스(예: Redis 정렬 집합 + 해시)를 LOGIN_LIMIT_BACKEND로 지정한다.
+# 요청 경로에서 호출되므로 모두 async이다.
+class LocalLoginLimitBackend:
+    def __init__(self, max_keys: int = LOGIN_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._hits: "OrderedDict[str, deque]" = OrderedDict()
+        self._locks: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # 실패를 기록하고 윈도우 안의 실패 횟수를 반환
+    async def hit(self, key: str, now: float, window: float) -> int:
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = self._hits[key] = deque()
+            self._hits.move_to_end(key)
+            hits.append(now)
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+            return len(hits)
+
+    async def reset_hits(self, key: str):
+        with self._lock:
+            self._hits.pop(key, None)
+
+    # (잠금 해제 시각, 잠금 단계)
+    async def get_lock(self, key: str) -> Optional[Tuple[float, int]]:
+        with self._lock:
+            return self._locks.get(key)
+
+    async def set_lock(self, key: str, until: float, level: int):
+        with self._lock:
+            self._locks[key] = (until, level)
+            self._locks.move_to_end(key)
+            while len(self._locks) > self.max_keys:
+                self._locks.popitem(last=False)
+
+    async def clear(self, key: str):
+        with self._lock:
+            self._hits.pop(key, None)
+            self._locks.pop(key, None)
+
+
+def load_backend(path: str = LOGIN_LIMIT_BACKEND):
+    if not path:
+        return LocalLoginLimitBackend()
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+## 로그인 시도 제한 ##
+# 식별자(이메일/전화번호)와 클라이언트 IP를 각각 키로 실패를 센다.
+# check()는 DB 조회와 bcrypt 검증 전에 호출해 잠긴 요청을 바로 429로 돌려보낸다.
+# 같은 IP를 여러 사용자가 쓸 수 있으므로 로그인 성공 시에는 식별자 기록만 지운다.
+class LoginLimiter:
+    def __init__(self, backend=None):
+        self.backend = backend or load_backend()
+        self.limits = {"id": LOGIN_LIMIT_IDENTIFIER_FAILURES, "ip": LOGIN_LIMIT_IP_FAILURES}
+        self._stats_lock = threading.Lock()
+        self.checks = 0
+        self.failures = 0
+        self.rejected = {"id": 0, "ip": 0}
+        self.lockouts = {"id": 0, "ip": 0}
+
+    @staticmethod
+    def _keys(identifier: str, ip: str):
+        return (("id", f"login:id:{identifier.lower()}"), ("ip", f"login:ip:{ip}"))
+
+    async def check(self, identifier: str, ip: str):
+        now = time.time()
+        with self._stats_lock:
+            self.checks += 1
+        for kind, key in self._keys(identifier, ip):
+            lock = await self.backend.get_lock(key)
+            if lock is not None and lock[0] > now:
+                with self._stats_lock:
+                    self.rejected[kind] += 1
+                raise HTTPException(status_code=429, detail="로그인 시도가 너무 많습니다. 잠시 후 다시 시도해주세요",
+                                    headers={"Retry-After": str(int(lock[0] - now) + 1)})
+
+    async def record_failure(self, identifier: str, ip: str):
+        now = time.time()
+        with self._stats_lock:
+            self.failures += 1
+        for kind, key in self._keys(identifier, ip):
+            if await self.backend.hit(key, now, LOGIN_LIMIT_WINDOW) < self.limits[kind]:
+                continue
+            lock = await self.backend.get_lock(key)
+            level = lock[1] if lock is not None and now - lock[0] < LOGIN_LOCKOUT_RESET else 0
+            duration = min(LOGIN_LOCKOUT_BASE * 2 ** level, LOGIN_LOCKOUT_MAX)
+            await self.backend.set_lock(key, now + duration, level + 1)
+            await self.backend.reset_hits(key)
+            with self._stats_lock:
+                self.lockouts[kind] += 1
+            print(f"[login_limiter] {kind} 잠금 {duration:.0f}초 (단계 {level + 1})")
+
+    async def record_success(self, identifier: str, ip: str):
+        await self.backend.clear(self._keys(identifier, ip)[0][1])
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "window_seconds": LOGIN_LIMIT_WINDOW,
+                "limits": dict(self.limits),
+                "checks": self.checks,
+                "failures": self.failures,
+                "rejected": dict(self.rejected),
+                "lockouts": dict(self.lockouts),
+            }
+
+login_limiter = LoginLimiter()
@@ -0,0 +1,137 @@
+import asyncio, os, sys, threading, time, traceback
+
+from collections import deque
+from datetime import datetime
+
+## 이벤트 루프 지연 감시 설정 (디버그/운영 점검용) ##
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "0") == "1"
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.05"))         # 측정 주기(초)
+LOOP_STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))     # 이 시간 이상 막히면 스택 수집
+LOOP_STALL_REPORT_SIZE = int(os.getenv("LOOP_STALL_REPORT_SIZE", "50"))
+LOOP_STALL_STACK_DEPTH = int(os.getenv("LOOP_STALL_STACK_DEPTH", "15"))
+
+# 지연 히스토그램 구간 상한(ms)
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+## 이벤트 루프 지연 감시 ##
+# 루프 위의 하트비트가 주기적으로 깨어나며 예정보다 늦어진 시간(지연)을 기록하고,
+# 별도 감시 스레드는 하트비트가 멈춘 동안 루프 스레드의 스택과 실행 중인 라우트를 수집한다.
+class EventLoopMonitor:
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, threshold_ms: float = LOOP_STALL_THRESHOLD_MS):
+        self.interval = interval
+        self.threshold = threshold_ms / 1000
+        self._lock = threading.Lock()
+        self._bucket_counts = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self._lag_count = 0
+        self._lag_sum = 0.0
+        self._lag_max = 0.0
+        self._stalls = deque(maxlen=LOOP_STALL_REPORT_SIZE)
+        self._current_stall = None
+        self._active_routes = {}
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_tick = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    ## 감시 시작 (이벤트 루프 안에서 호출) ##
+    def start(self):
+        if not LOOP_MONITOR_ENABLED or self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._loop.create_task(self._heartbeat())
+        threading.Thread(target=self._watchdog, name="event-loop-watchdog", daemon=True).start()
+
+    async def _heartbeat(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - started - self.interval, 0.0)
+            with self._lock:
+                self._last_tick = now
+                self._record_lag(lag)
+                if self._current_stall is not None:
+                    self._current_stall["duration_ms"] = round(lag * 1000, 1)
+                    self._current_stall = None
+
+    def _record_lag(self, lag: float):
+        lag_ms = lag * 1000
+        index = next((i for i, bound in enumerate(LAG_BUCKETS_MS) if lag_ms <= bound), len(LAG_BUCKETS_MS))
+        self._bucket_counts[index] += 1
+        self._lag_count += 1
+        self._lag_sum += lag
+        self._lag_max = max(self._lag_max, lag)
+
+    def _watchdog(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                blocked = time.monotonic() - self._last_tick - self.interval
+                if blocked < self.threshold or self._current_stall is not None:
+                    continue
+                stall = self._current_stall = self._capture_stall(blocked)
+                self._stalls.append(stall)
+            print(f"[event_loop] {stall['route']} 이벤트 루프가 {blocked * 1000:.0f}ms 이상 막힘\n{''.join(stall['stack'][-3:])}")
+
+    def _capture_stall(self, blocked: float) -> dict:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame)[-LOOP_STALL_STACK_DEPTH:] if frame is not None else []
+        task = asyncio.current_task(self._loop)
+        return {
+            "at": datetime.utcnow().isoformat(),
+            "route": self._active_routes.get(task),
+            "blocked_ms": round(blocked * 1000, 1),
+            "duration_ms": None,     # 루프가 다시 돌면 전체 지연 시간으로 채워짐
+            "stack": stack,
+        }
+
+    ## 요청 라우트 추적 ##
+    def enter_route(self, task, route: str):
+        self._active_routes[task] = route
+
+    def exit_route(self, task):
+        self._active_routes.pop(task, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            buckets = {f"le_{bound}ms": count for bound, count in zip(LAG_BUCKETS_MS, self._bucket_counts)}
+            buckets["gt_5000ms"] = self._bucket_counts[-1]
+            return {
+                "enabled": self.running,
+                "interval_ms": self.interval * 1000,
+                "threshold_ms": self.threshold * 1000,
+                "lag": {
+                    "count": self._lag_count,
+                    "avg_ms": round(self._lag_sum / self._lag_count * 1000, 3) if self._lag_count else 0.0,
+                    "max_ms": round(self._lag_max * 1000, 1),
+                    "histogram": buckets,
+                },
+                "stalls": list(self._stalls)[::-1],
+            }
+
+loop_monitor = EventLoopMonitor()
+
+
+## 라우트 추적 미들웨어 ##
+# 감시 중일 때만 요청을 처리하는 태스크와 라우트를 연결해 둔다.
+class LoopMonitorMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not loop_monitor.running:
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        loop_monitor.enter_route(task, f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            loop_monitor.exit_route(task)
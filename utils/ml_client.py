@@ -0,0 +1,25 @@
+import os
+
+## 신체 측정(ML) 서버 클라이언트 ##
+# requests 세션은 처음 호출할 때 만들고, 이후 연결을 재사용한다.
+ML_TIMEOUT = float(os.getenv("ML_TIMEOUT", "60"))
+
+_session = None
+
+def ml_address():
+    return os.getenv("ML_HOST"), os.getenv("ML_PORT")
+
+def get_ml_session():
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    return _session
+
+## 이미지로 신체 치수 추정 요청 ##
+def request_process_image(file, _fov: int = 60):
+    ml_host, ml_port = ml_address()
+    url = f"http://{ml_host}:{ml_port}/process-image/?_fov={_fov}"
+    files = {'file': (file.filename, file.file, file.content_type)}
+    headers = {'accept': 'application/json'}
+    return get_ml_session().post(url, headers=headers, files=files, timeout=ML_TIMEOUT)
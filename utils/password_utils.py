@@ -1,12 +1,158 @@
+import os, threading, time
+
+from collections import deque
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
+from .executors import password_pool
+
 ## 비밀번호 해싱 설정 ##
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# PASSWORD_BCRYPT_ROUNDS를 지정하면 그 값을 쓰고, 없으면 시작 시 벤치마크로
+# 해시 1회가 PASSWORD_HASH_TARGET_MS를 넘지 않는 가장 높은 cost를 고른다.
+# 보정은 cost를 기본값(12)보다 올리기만 한다. (부팅 중 바쁜 호스트에서 해시가 약해지지 않도록)
+DEFAULT_BCRYPT_ROUNDS = 12
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "0"))
+PASSWORD_BCRYPT_MIN_ROUNDS = max(int(os.getenv("PASSWORD_BCRYPT_MIN_ROUNDS", str(DEFAULT_BCRYPT_ROUNDS))), DEFAULT_BCRYPT_ROUNDS)
+PASSWORD_BCRYPT_MAX_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_MAX_ROUNDS", "14"))
+PASSWORD_HASH_TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS", "250"))
+# 해싱 풀에 대기할 수 있는 최대 작업 수 (넘으면 503)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(password_pool.size * 4)))
+PASSWORD_HASH_LATENCY_WINDOW = 1000
+# 벤치마크에 쓰는 cost (시작 시간을 줄이기 위해 낮은 cost로 재고 2배씩 추정)
+PASSWORD_BCRYPT_BENCH_ROUNDS = 10
+
+
+def bcrypt_rounds(hashed_password: str) -> int:
+    # $2b$12$... 형식에서 cost 추출
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+## 비밀번호 해싱 서비스 ##
+# bcrypt는 전용 해싱 풀(password_pool)에서 실행하고, 대기 작업이 한도를 넘으면
+# 큐에 쌓지 않고 바로 503을 반환한다. 작업별 소요 시간은 stats()로 확인한다.
+class PasswordHasher:
+    def __init__(self, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.max_pending = max_pending
+        self.rounds = PASSWORD_BCRYPT_ROUNDS or DEFAULT_BCRYPT_ROUNDS
+        self.calibrated = False
+        self._context = self._make_context(self.rounds)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self.upgraded = 0
+        self._latencies = {"hash": deque(maxlen=PASSWORD_HASH_LATENCY_WINDOW),
+                           "verify": deque(maxlen=PASSWORD_HASH_LATENCY_WINDOW)}
+
+    @staticmethod
+    def _make_context(rounds: int) -> CryptContext:
+        return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+    ## 시작 시 cost 보정 (이벤트 루프 밖에서 호출) ##
+    # 낮은 cost로 몇 번 해싱해 가장 빠른 시간을 재고, cost가 1 오를 때마다 시간이 2배가 되는 것으로 추정한다.
+    # 벤치마크가 실패하면 기본 cost를 그대로 쓰고 서버는 계속 뜬다.
+    def calibrate(self, samples: int = 3) -> int:
+        if PASSWORD_BCRYPT_ROUNDS:
+            return self.rounds
+
+        try:
+            context = self._make_context(PASSWORD_BCRYPT_BENCH_ROUNDS)
+            elapsed = []
+            for _ in range(samples):
+                started = time.perf_counter()
+                context.hash("calibration-password")
+                elapsed.append(time.perf_counter() - started)
+        except Exception as e:
+            print(f"[password] bcrypt cost 보정 실패, 기본 cost {self.rounds} 사용: {e!r}")
+            return self.rounds
+        base_ms = min(elapsed) * 1000
+
+        rounds = PASSWORD_BCRYPT_MIN_ROUNDS
+        while rounds < PASSWORD_BCRYPT_MAX_ROUNDS and base_ms * 2 ** (rounds + 1 - PASSWORD_BCRYPT_BENCH_ROUNDS) <= PASSWORD_HASH_TARGET_MS:
+            rounds += 1
+
+        self.rounds = rounds
+        self._context = self._make_context(rounds)
+        self.calibrated = True
+        print(f"[password] bcrypt cost {rounds} 선택 (cost {PASSWORD_BCRYPT_BENCH_ROUNDS}: {base_ms:.1f}ms, 목표 {PASSWORD_HASH_TARGET_MS:.0f}ms)")
+        return rounds
+
+    ## 기존 해시의 cost가 현재보다 낮으면 로그인 시 다시 해싱 ##
+    # 워커마다 보정 결과가 다를 수 있으므로 cost를 낮추는 방향으로는 바꾸지 않는다.
+    def needs_upgrade(self, hashed_password: str) -> bool:
+        return bcrypt_rounds(hashed_password) < self.rounds
+
+    def hash_sync(self, password: str) -> str:
+        return self._timed("hash", self._context.hash, password)
+
+    def verify_sync(self, plain_password: str, hashed_password: str) -> bool:
+        return self._timed("verify", self._context.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(self.hash_sync, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(self.verify_sync, plain_password, hashed_password)
+
+    async def upgrade(self, plain_password: str) -> str:
+        hashed_password = await self.hash(plain_password)
+        with self._lock:
+            self.upgraded += 1
+        return hashed_password
+
+    async def _submit(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="요청이 많아 잠시 후 다시 시도해주세요",
+                                    headers={"Retry-After": "1"})
+            self._pending += 1
+        try:
+            return await password_pool.run(func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _timed(self, op: str, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._latencies[op].append(elapsed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = {}
+            for op, samples in self._latencies.items():
+                ordered = sorted(samples)
+                latencies[op] = {
+                    "count": len(ordered),
+                    "avg_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3) if ordered else 0.0,
+                    "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+                }
+            return {
+                "rounds": self.rounds,
+                "calibrated": self.calibrated,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "rejected": self.rejected,
+                "upgraded": self.upgraded,
+                "latency": latencies,
+                "pool": password_pool.stats(),
+            }
+
+password_hasher = PasswordHasher()
+
 
 ## 비밀번호 해시화 ##
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash_sync(password)
 
 ## 일반 비밀번호와 해시화된 비밀번호 확인(검증) ##
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return password_hasher.verify_sync(plain_password, hashed_password)
@@ -1,15 +1,61 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import APIKeyHeader
+from sqlalchemy import delete, update
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, ExpiredSignatureError, jwt # type: ignore
 from database import get_db
 from models import User, RefreshToken
 from . import password_utils
-from dotenv import load_dotenv
+from .token_cache import token_cache, user_snapshot, attach_user_snapshot
 from datetime import datetime, timedelta
-import os
+from collections import OrderedDict
+import hashlib, hmac, os, threading, time, uuid
+
+# 재발급으로 폐기된 리프레시 토큰을 기억하는 시간(초)과 최대 개수 (재사용 감지용)
+ROTATED_TOKEN_TTL = float(os.getenv("ROTATED_TOKEN_TTL", "600"))
+ROTATED_TOKEN_MAX = int(os.getenv("ROTATED_TOKEN_MAX", "10000"))
+
+
+## 최근 폐기된 리프레시 토큰 ##
+# 재발급에 쓰인 토큰 해시를 잠시 보관한다. 폐기된 토큰이 다시 오면 탈취된 것으로 보고 사용자의 토큰을 모두 폐기한다.
+# 워커별 메모리에만 있으므로 같은 워커로 온 재사용만 감지된다.
+class RotatedTokens:
+    def __init__(self, ttl: float = ROTATED_TOKEN_TTL, max_entries: int = ROTATED_TOKEN_MAX):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rotations = 0
+        self.reuse_detected = 0
+
+    def add(self, token_hash: str):
+        with self._lock:
+            self._entries[token_hash] = time.monotonic() + self.ttl
+            self._entries.move_to_end(token_hash)
+            self.rotations += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def contains(self, token_hash: str) -> bool:
+        with self._lock:
+            expires_at = self._entries.get(token_hash)
+            if expires_at is None:
+                return False
+            if expires_at < time.monotonic():
+                del self._entries[token_hash]
+                return False
+            self.reuse_detected += 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "rotations": self.rotations,
+                "reuse_detected": self.reuse_detected,
+            }
 
-load_dotenv()
 ## 토큰 생성 함수 ##
 class AuthHandler:
     def __init__(self, secret_key = os.getenv('SECRET_KEY'), 
@@ -20,11 +66,18 @@ class AuthHandler:
         self.algorithm = algorithm
         self.access_token_expire_minutes = access_token_expire_minutes
         self.refresh_token_expire_days = refresh_token_expire_days
+        self.rotated_tokens = RotatedTokens()
+
+    ## 리프레시 토큰 해시 (DB에는 해시만 저장) ##
+    @staticmethod
+    def hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
 
     ## 토큰 인코딩 ##
     def encode_token(self, user_id: int, expires_delta: timedelta) -> str:
         encode_payload = {
             'sub': str(user_id),
+            'jti': uuid.uuid4().hex,     # 같은 초에 발급된 토큰도 서로 다르도록
             'iat': datetime.utcnow(),
             'exp': datetime.utcnow() + expires_delta
         }
@@ -56,8 +109,8 @@ class AuthHandler:
     ## 리프레시 토큰 마지막 사용 시간 업데이트 ##
     def update_last_used_at(self, db: Session, token: str):
         try:
-            print(f"Updating last used at for token: {token}")
-            refresh_token = db.query(RefreshToken).filter(RefreshToken.token == token).first()
+            print(f"Updating last used at for token: {self.hash_token(token)[:8]}")
+            refresh_token = db.query(RefreshToken).filter(RefreshToken.token_hash == self.hash_token(token)).first()
         
             if refresh_token:
                 refresh_token.last_used_at = datetime.utcnow()
@@ -69,20 +122,21 @@ class AuthHandler:
             db.rollback()
             raise HTTPException(status_code=500, detail=f"DB 업데이트 중 오류 발생: {str(e)}")
     ## 토큰 DB저장 ##
+    # 같은 트랜잭션에서 사용자의 만료된 토큰도 정리한다.
     def save_token(self, db: Session, user_id: int, token: str, expires_at: datetime = None):
         if expires_at is None:
             expires_at = datetime.utcnow() + timedelta(days=self.refresh_token_expire_days)
 
-        refresh_token = RefreshToken(user_id=user_id, token=token, expires_at=expires_at,
+        db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.expires_at < datetime.utcnow()))
+        refresh_token = RefreshToken(user_id=user_id, token_hash=self.hash_token(token), expires_at=expires_at,
                                          last_used_at=None)
         db.add(refresh_token)
         db.commit()
-        db.refresh(refresh_token)
         return refresh_token
         
     ## DB에서 사용가능한 리프레시 토큰 조회 ##
     def get_refreshtoken(self, db: Session, token: str) -> RefreshToken:
-        refresh_token = db.query(RefreshToken).filter(RefreshToken.token == token).first()
+        refresh_token = db.query(RefreshToken).filter(RefreshToken.token_hash == self.hash_token(token)).first()
         if not refresh_token:
             raise HTTPException(status_code=401, detail="토근이 유효하지 않습니다")
         
@@ -91,37 +145,138 @@ class AuthHandler:
         
         return refresh_token
 
+    ## 리프레시 토큰 재발급 ##
+    # 유효한 기존 토큰 행을 새 토큰으로 바꾸는 조건부 UPDATE 한 번으로 처리한다.
+    # 조회-삭제-저장 사이에 토큰이 없는 구간이 없고, 같은 토큰으로 동시에 재발급하면 한 요청만 성공한다.
+    def rotate_refresh_token(self, db: Session, user_id: int, token: str, new_token: str) -> bool:
+        token_hash = self.hash_token(token)
+        if self.rotated_tokens.contains(token_hash):
+            # 이미 폐기된 토큰의 재사용 -> 사용자의 리프레시 토큰 모두 폐기
+            print(f"[auth] 폐기된 리프레시 토큰 재사용 감지 (user_id={user_id})")
+            self.delete_user_tokens(db, user_id)
+            return False
+
+        now = datetime.utcnow()
+        result = db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == token_hash,
+                   RefreshToken.user_id == user_id,
+                   RefreshToken.expires_at >= now)
+            .values(token_hash=self.hash_token(new_token),
+                    expires_at=now + timedelta(days=self.refresh_token_expire_days),
+                    last_used_at=now)
+        )
+        if result.rowcount != 1:
+            db.rollback()
+            return False
+        db.commit()
+        self.rotated_tokens.add(token_hash)
+        return True
+
     ## 토큰 DB 삭제 ##
     def delete_token(self, db: Session, token: str):
-        refresh_token = db.query(RefreshToken).filter(RefreshToken.token == token).first()
-        if refresh_token:
-            db.delete(refresh_token)
-            db.commit()
+        db.execute(delete(RefreshToken).where(RefreshToken.token_hash == self.hash_token(token)))
+        db.commit()
+
+    ## 사용자의 리프레시 토큰 모두 삭제 ##
+    def delete_user_tokens(self, db: Session, user_id: int) -> int:
+        result = db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+        db.commit()
+        return result.rowcount
 
 auth_handler = AuthHandler()
 authorization = APIKeyHeader(name="Authorization")
 
-## 사용자 조회 ##
-def get_current_user(bearer_token: str = Depends(authorization), db: Session = Depends(get_db)) -> User:
+# 운영 지표 등 관리자 API용 토큰 (지정하지 않으면 관리자 API는 모두 거절된다)
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+admin_authorization = APIKeyHeader(name="X-Admin-Token", auto_error=False)
+
+## 관리자 확인 ##
+def require_admin(admin_token: str = Depends(admin_authorization)):
+    if not ADMIN_API_TOKEN or not admin_token or not hmac.compare_digest(admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=403, detail="관리자 권한이 필요합니다")
 
+## Bearer 토큰 추출 ##
+def _bearer_token(bearer_token: str) -> str:
     if not bearer_token:
         raise HTTPException(status_code=401, detail="인증 정보가 없습니다")
     if not bearer_token.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Bearer 토큰이 필요합니다")
-    
-    token = bearer_token.split(" ")[1]
+    return bearer_token.split(" ")[1]
+
+
+## 인증 주체 ##
+# 토큰 claims만으로 만든 가벼운 사용자 정보. user_id만 필요한 라우트는 DB 조회 없이 사용하고,
+# 전체 User가 필요할 때만 load_user / aload_user로 조회한다. (요청 안에서 한 번만 조회)
+class Principal:
+    __slots__ = ("user_id", "claims", "_user")
+
+    def __init__(self, user_id: int, claims: dict):
+        self.user_id = user_id
+        self.claims = claims
+        self._user = None
+
+    def load_user(self, db: Session) -> User:
+        if self._user is None:
+            self._user = db.get(User, self.user_id)
+            if not self._user:
+                raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+        return self._user
+
+    async def aload_user(self, db: AsyncSession) -> User:
+        if self._user is None:
+            self._user = await db.get(User, self.user_id)
+            if not self._user:
+                raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+        return self._user
+
+## 인증 주체 조회 ##
+# 서명과 만료만 확인하고 DB는 조회하지 않는다. (삭제된 사용자의 토큰도 만료 전까지는 통과)
+# 디코딩은 가벼우므로 스레드풀을 거치지 않도록 async 의존성으로 둔다.
+async def get_current_principal(request: Request, bearer_token: str = Depends(authorization)) -> Principal:
+    token = _bearer_token(bearer_token)
+    payload = auth_handler.decode_token(token, db=None)
+    user_id = payload.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="토큰이 유효하지 않습니다")
+
+    # 읽기 세션의 최근 쓰기 확인과 쓰기 기록에 사용
+    request.state.user_id = user_id
+    return Principal(user_id, payload)
+
+
+## 사용자 조회 ##
+# 쓰기 라우트가 반환된 user를 같은 세션으로 수정하므로 주 DB 세션(get_db)을 사용한다.
+# 검증된 토큰은 캐시되어, 같은 토큰의 재요청은 JWT 디코딩과 사용자 SELECT 없이 처리된다.
+def get_current_user(request: Request, bearer_token: str = Depends(authorization), db: Session = Depends(get_db)) -> User:
+
+    token = _bearer_token(bearer_token)
 
     try:
+        cached = token_cache.get(token)
+        if cached is not None:
+            payload, snapshot = cached
+            request.state.user_id = snapshot["user_id"]
+            return attach_user_snapshot(db, snapshot)
+
         payload = auth_handler.decode_token(token, db=db)
         if not payload:
             raise HTTPException(status_code=401, detail="토큰이 유효하지 않습니다")
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+        # 읽기 세션의 최근 쓰기 확인과 쓰기 기록에 사용
+        request.state.user_id = int(user_id)
+        version = token_cache.version(int(user_id))
         user = user = db.query(User).filter(User.user_id == user_id).first()
         if not user:
             raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
-        
+
+        token_cache.set(token, version, payload, user_snapshot(user))
         return user
     except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="토근이 유효하지 않습니다")
@@ -0,0 +1,148 @@
+import hashlib, os, threading, time
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from models import User
+
+# 검증된 토큰 캐시 설정 (최대 토큰 수, 최대 유지 시간(초))
+# 토큰 만료(exp)와 최대 유지 시간 중 먼저 오는 시각까지 유지한다.
+# 여러 워커 사이에는 무효화가 전파되지 않으므로 최대 유지 시간으로 오래된 사용자 정보를 제한한다.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+
+# 캐시에 담는 사용자 컬럼 (비밀번호 해시는 메모리에 두지 않는다)
+USER_SNAPSHOT_FIELDS = ("user_id", "user_uuid", "user_name", "phone_number", "email", "goals", "created_at", "last_login")
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def user_snapshot(user: User) -> dict:
+    return {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+
+
+## 검증된 토큰 캐시 ##
+# sha256(token) -> (user_id, 디코딩된 claims, 사용자 스냅샷, 만료 시각)
+# 사용자 정보가 바뀌면 버전이 올라가며, 조회 도중 버전이 바뀐 결과는 저장하지 않는다.
+class VerifiedTokenCache:
+    def __init__(self, max_entries: int = AUTH_TOKEN_CACHE_SIZE, max_ttl: float = AUTH_TOKEN_CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, Tuple[int, dict, dict, float]]" = OrderedDict()
+        self._user_tokens: Dict[int, Set[str]] = {}
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def version(self, user_id: int) -> int:
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def get(self, token: str) -> Optional[Tuple[dict, dict]]:
+        key = token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            user_id, claims, snapshot, expires_at = entry
+            if expires_at < time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims, snapshot
+
+    def set(self, token: str, version: int, claims: dict, snapshot: dict):
+        user_id = snapshot["user_id"]
+        expires_at = min(float(claims.get("exp", 0)), time.time() + self.max_ttl)
+        key = token_key(token)
+        with self._lock:
+            if version != self._versions.get(user_id, 0) or expires_at <= time.time():
+                return
+            self._entries[key] = (user_id, claims, snapshot, expires_at)
+            self._entries.move_to_end(key)
+            self._user_tokens.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        user_id = self._entries.pop(key)[0]
+        keys = self._user_tokens.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_tokens[user_id]
+
+    ## 토큰 하나 무효화 ##
+    def invalidate_token(self, token: str):
+        key = token_key(token)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    ## 사용자의 모든 토큰 무효화 (로그아웃, 토큰 재발급, 사용자 정보 변경) ##
+    def invalidate_user(self, user_id: int):
+        user_id = int(user_id)
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            for key in list(self._user_tokens.get(user_id, ())):
+                self._remove(key)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+token_cache = VerifiedTokenCache()
+
+
+## 스냅샷으로 사용자 객체 복원 ##
+# SELECT 없이 세션에 영속 객체로 붙인다. 스냅샷에 없는 컬럼(비밀번호 해시)과 관계는 접근할 때 지연 로딩된다.
+def attach_user_snapshot(db: Session, snapshot: dict) -> User:
+    user = db.identity_map.get(inspect(User).identity_key_from_primary_key((snapshot["user_id"],)))
+    if user is not None:
+        return user
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    db.add(user)
+    return user
+
+
+# ORM으로 User가 변경/삭제되면 커밋 시점에 해당 사용자의 토큰 캐시를 무효화한다.
+@event.listens_for(Session, "after_flush")
+def _collect_user_writes(session, flush_context):
+    user_ids = session.info.setdefault("user_writes", set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.__dict__.get("user_id") is not None:
+            user_ids.add(obj.__dict__["user_id"])
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_user_writes(session):
+    for user_id in session.info.pop("user_writes", ()):
+        token_cache.invalidate_user(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_writes(session):
+    session.info.pop("user_writes", None)